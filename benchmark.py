@@ -0,0 +1,416 @@
+"""Reproducible benchmarks of the dashboard's data path.
+
+Generates synthetic ``new_suspect_file2`` databases (same schema as the
+registry, seeded so every run produces identical data) and times each stage
+of the dashboard headlessly::
+
+    python benchmark.py                                   # 100k, 1M and 10M rows
+    python benchmark.py --rows 100000 --repeat 10         # one size, more samples
+    python benchmark.py --pipelines sqlite snapshot       # skip the in-memory pandas path
+
+Three pipelines run the same stages (load, date parsing, month filter,
+nunique, value_counts, top-N selection, drill-down filter):
+
+* ``pandas`` - the original dashboard: read the whole table, then work on
+  the DataFrame.
+* ``sqlite`` - the current dashboard: aggregates pushed down to SQLite via
+  :mod:`queries` and :mod:`pagination`, with no cache in front.
+* ``snapshot`` - the columnar Parquet snapshot of :mod:`snapshot` (needs
+  pyarrow).
+
+Every (size, pipeline) pair runs in a fresh process so peak memory figures
+don't bleed into each other. Timed repeats run untraced, and one extra run
+under tracemalloc measures each stage's peak Python allocation. The
+results (p50/p90/p99 latency, rows per second, output size, peak memory and
+the environment they were measured on) are printed and written to a JSON
+file so runs can be compared over time. Nothing is downloaded; the
+generated databases are kept in ``--data-dir`` and reused.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+import charts
+import pagination
+import queries
+import snapshot
+from profiling import RenderProfile
+
+DEFAULT_ROWS = [100_000, 1_000_000, 10_000_000]
+DEFAULT_SEED = 42
+CHUNK_SIZE = 250_000
+PIPELINES = ["pandas", "sqlite", "snapshot"]
+STAGES = ["load", "date parsing", "month filter", "nunique", "value_counts", "top-N selection",
+          "drill-down filter"]
+DATA_DIR = os.path.join(tempfile.gettempdir(), "suspect_registry_benchmark")
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_results")  # git-ignored
+GENERATOR_VERSION = 2  # bump whenever synthetic_chunk changes, so stale databases are regenerated
+SELECTED_MONTHS = 3
+DRILL_DOWN_COLUMN = "phone_number_of_suspect"
+PAGE_SIZE = 50
+
+COLUMNS = ["index", "bank_name", "source", queries.DATE_COLUMN] + queries.IDENTIFIER_COLUMNS
+
+# Large banks dominate the registry; the long tail is co-operative and small banks
+BANKS = [
+    ("State Bank of India", "SBIN"), ("HDFC Bank", "HDFC"), ("ICICI Bank", "ICIC"), ("Axis Bank", "UTIB"),
+    ("Punjab National Bank", "PUNB"), ("Bank of Baroda", "BARB"), ("Canara Bank", "CNRB"),
+    ("Union Bank of India", "UBIN"), ("Kotak Mahindra Bank", "KKBK"), ("IndusInd Bank", "INDB"),
+    ("Yes Bank", "YESB"), ("IDFC First Bank", "IDFB"), ("Bank of India", "BKID"), ("Indian Bank", "IDIB"),
+    ("Central Bank of India", "CBIN"), ("Indian Overseas Bank", "IOBA"), ("UCO Bank", "UCBA"),
+    ("Bank of Maharashtra", "MAHB"), ("Federal Bank", "FDRL"), ("Paytm Payments Bank", "PYTM"),
+    ("Airtel Payments Bank", "AIRP"), ("AU Small Finance Bank", "AUBL"),
+] + [(f"Co-operative Bank {i:03d}", f"C{i:03d}") for i in range(1, 129)]
+SOURCES = ["NCRP", "Bank", "Police", "CFCFRMS", "Citizen", "I4C", "Telecom", "Other"]
+SOURCE_WEIGHTS = [0.45, 0.2, 0.12, 0.1, 0.06, 0.04, 0.02, 0.01]
+PHONE_PREFIXES = ["", "+91 ", "0", "+91-"]
+PHONE_PREFIX_WEIGHTS = [0.6, 0.25, 0.1, 0.05]
+FIRST_NAMES = ["Aarav", "Vivaan", "Aditya", "Arjun", "Rohan", "Rahul", "Amit", "Suresh", "Ramesh", "Vikram",
+               "Ananya", "Diya", "Priya", "Neha", "Pooja", "Kavya", "Sneha", "Anjali", "Meera", "Sunita"]
+LAST_NAMES = ["Sharma", "Verma", "Gupta", "Singh", "Kumar", "Patel", "Shah", "Reddy", "Rao", "Nair",
+              "Iyer", "Das", "Bose", "Yadav", "Mishra", "Joshi", "Khan", "Ali", "Mehta", "Jain"]
+EMAIL_DOMAINS = ["gmail.com", "yahoo.com", "outlook.com", "rediffmail.com", "protonmail.com", "hotmail.com"]
+FIRST_MONTH, LAST_MONTH = "2023-01", "2024-12"
+# Suspects lend each other phones, emails and accounts only within small rings,
+# and a few rings front for the same shell company, so linked clusters stay small
+RING_SIZE = 4
+RINGS_PER_COMPANY = 5
+
+
+# ---- synthetic data ---------------------------------------------------------
+def _skewed(rng, pool, size, skew):
+    """Indices into ``pool`` where a few values repeat a lot (larger ``skew``, heavier head)."""
+    return np.minimum((pool * rng.random(size) ** skew).astype(np.int64), pool - 1)
+
+
+def _own_or_ring(rng, person, size, share):
+    # Most rows carry the suspect's own identifier; the rest borrow one from a member of the same ring
+    ring_member = person - person % RING_SIZE + rng.integers(0, RING_SIZE, size)
+    return np.where(rng.random(size) < share, person, ring_member)
+
+
+def _strings(*parts):
+    joined = np.asarray(parts[0]).astype(str)
+    for part in parts[1:]:
+        joined = np.char.add(joined, np.asarray(part).astype(str))
+    return joined.astype(object)
+
+
+def _with_nulls(rng, values, share):
+    values[rng.random(len(values)) < share] = None
+    return values
+
+
+def synthetic_chunk(rng, start, size, total):
+    """``size`` rows of the registry starting at row ``start`` of a ``total``-row table."""
+    # Suspects recur: a small share of people account for a large share of reports
+    person = _skewed(rng, max(1, int(total * 0.4)), size, 3.0)
+
+    bank = _skewed(rng, len(BANKS), size, 2.5)
+    bank_names = np.array([name for name, _ in BANKS], dtype=object)[bank]
+    branch = _skewed(rng, 5000, size, 2.0)
+    ifsc = _strings(np.array([code for _, code in BANKS])[bank], "0", np.char.zfill(branch.astype(str), 6))
+
+    source = rng.choice(np.array(SOURCES, dtype=object), size, p=SOURCE_WEIGHTS)
+
+    # Report volume grows month on month; a few dates are missing or unparseable
+    months = np.arange(FIRST_MONTH, np.datetime64(LAST_MONTH) + 1, dtype="datetime64[M]")
+    weights = np.linspace(1, 3, len(months))
+    month = rng.choice(months, size, p=weights / weights.sum())
+    moment = (month.astype("datetime64[s]") + rng.integers(0, 28, size) * np.timedelta64(1, "D")
+              + rng.integers(0, 86400, size) * np.timedelta64(1, "s"))
+    dates = np.char.replace(np.datetime_as_string(moment, unit="s"), "T", " ").astype(object)
+    dates[rng.random(size) < 0.005] = "N/A"
+    dates = _with_nulls(rng, dates, 0.005)
+
+    names = _strings(np.array(FIRST_NAMES)[person % len(FIRST_NAMES)], " ",
+                     np.array(LAST_NAMES)[(person // len(FIRST_NAMES)) % len(LAST_NAMES)])
+
+    email_id = _own_or_ring(rng, person, size, 0.8)
+    emails = _strings(np.array(FIRST_NAMES)[email_id % len(FIRST_NAMES)], ".", email_id, "@",
+                      np.array(EMAIL_DOMAINS)[email_id % len(EMAIL_DOMAINS)])
+    shouted = rng.random(size) < 0.1
+    emails[shouted] = np.char.upper(emails[shouted].astype(str))
+    emails = _with_nulls(rng, emails, 0.05)
+
+    phone_id = _own_or_ring(rng, person, size, 0.85)
+    phones = _strings(rng.choice(PHONE_PREFIXES, size, p=PHONE_PREFIX_WEIGHTS),
+                      6_000_000_000 + (phone_id * 7_919) % 4_000_000_000)
+    phones = _with_nulls(rng, phones, 0.03)
+
+    account_id = _own_or_ring(rng, person, size, 0.7)
+    accounts = _strings(100_000_000_000 + (account_id * 2_654_435_761) % 900_000_000_000)
+
+    company = person // (RING_SIZE * RINGS_PER_COMPANY)
+    cins = _strings("U", 10_000 + company % 90_000, "MH", 2000 + company % 25, "PTC",
+                    np.char.zfill(company.astype(str), 6))
+    cins = _with_nulls(rng, cins, 0.85)
+
+    return [np.arange(start, start + size).tolist(), bank_names.tolist(), source.tolist(), dates.tolist(),
+            names.tolist(), emails.tolist(), phones.tolist(), ifsc.tolist(), accounts.tolist(), cins.tolist()]
+
+
+def generate(path, rows, seed=DEFAULT_SEED, chunk_size=CHUNK_SIZE):
+    """Write a ``rows``-row synthetic registry to ``path``; the same seed gives the same data."""
+    tmp_path = f"{path}.tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    conn = sqlite3.connect(tmp_path)
+    try:
+        conn.execute("PRAGMA journal_mode = OFF")
+        conn.execute("PRAGMA synchronous = OFF")
+        table = queries.quote(queries.TABLE)
+        # Same layout pandas' to_sql gave the original database
+        definitions = [f"{queries.quote(column)} {'INTEGER' if column == 'index' else 'TEXT'}" for column in COLUMNS]
+        conn.execute(f"CREATE TABLE {table} ({', '.join(definitions)})")
+        conn.execute(f"CREATE INDEX {queries.quote(f'ix_{queries.TABLE}_index')} ON {table} ({queries.quote('index')})")
+        insert = f"INSERT INTO {table} VALUES ({', '.join('?' for _ in COLUMNS)})"
+        for chunk, start in enumerate(range(0, rows, chunk_size)):
+            rng = np.random.default_rng([seed, chunk])
+            conn.executemany(insert, zip(*synthetic_chunk(rng, start, min(chunk_size, rows - start), rows)))
+            conn.commit()
+    finally:
+        conn.close()
+    os.replace(tmp_path, path)
+
+
+def dataset(data_dir, rows, seed=DEFAULT_SEED):
+    """Path of the ``rows``-row database for ``seed``, generating it on first use."""
+    os.makedirs(data_dir, exist_ok=True)
+    path = os.path.join(data_dir, f"suspects_{rows}_seed{seed}_v{GENERATOR_VERSION}.db")
+    if not os.path.exists(path):
+        started = time.perf_counter()
+        generate(path, rows, seed)
+        print(f"Generated {rows} rows in {time.perf_counter() - started:.1f} s: {path}")
+    return path
+
+
+def workload(db_path):
+    """What the benchmark asks of every pipeline: the latest months and the busiest phone number."""
+    conn = queries.connect(db_path)
+    try:
+        months = queries.list_months(conn)[-SELECTED_MONTHS:]
+        value = queries.value_counts(conn, DRILL_DOWN_COLUMN, queries.month_filter(months), limit=1)["value"][0]
+        columns = [column for column in queries.table_columns(conn) if column not in queries.EXCLUDED_COLUMNS]
+        rows = queries.record_count(conn)
+    finally:
+        conn.close()
+    return {"rows": rows, "months": months, "column": DRILL_DOWN_COLUMN, "value": value, "columns": columns}
+
+
+# ---- pipelines --------------------------------------------------------------
+def run_pandas(db_path, case, profile):
+    conn = queries.connect(db_path)
+    try:
+        df = profile.run("load", pd.read_sql_query, f"SELECT * FROM {queries.quote(queries.TABLE)}", conn)
+    finally:
+        conn.close()
+    with profile.span("date parsing") as stage:
+        df[queries.DATE_COLUMN] = pd.to_datetime(df[queries.DATE_COLUMN], errors='coerce')
+        df = df.dropna(subset=[queries.DATE_COLUMN])
+        df["Month_Year"] = df[queries.DATE_COLUMN].dt.to_period("M").astype(str)
+        stage["result"] = sorted(df["Month_Year"].unique())
+    with profile.span("month filter") as stage:
+        stage["result"] = df = df[df["Month_Year"].isin(case["months"])]
+    profile.run("nunique", lambda: df.drop(columns=queries.EXCLUDED_COLUMNS, errors='ignore').nunique())
+    with profile.span("value_counts") as stage:
+        df["source"].value_counts()
+        stage["result"] = counts = df["bank_name"].value_counts().rename_axis("value").reset_index(name="count")
+    profile.run("top-N selection", charts.top_n_with_other, counts, "value", "count")
+    profile.run("drill-down filter", lambda: df[df[case["column"]] == case["value"]])
+
+
+def run_sqlite(db_path, case, profile):
+    with profile.span("load") as stage:
+        conn = queries.connect(db_path)
+        stage["result"] = queries.table_columns(conn)
+    try:
+        where = queries.month_filter(case["months"])
+        profile.run("date parsing", queries.list_months, conn)
+        profile.run("month filter", queries.record_count, conn, where)
+        profile.run("nunique", queries.distinct_counts, conn, case["columns"], where)
+        with profile.span("value_counts") as stage:
+            queries.value_counts(conn, "source", where)
+            stage["result"] = counts = queries.value_counts(conn, "bank_name", where)
+        profile.run("top-N selection", charts.top_n_with_other, counts, "value", "count")
+        with profile.span("drill-down filter") as stage:
+            predicate = queries.conjoin(where, queries.column_filter(case["column"], case["value"]))
+            stage["result"] = pagination.fetch_page(conn, predicate, case["columns"], page_size=PAGE_SIZE)
+            queries.record_count(conn, predicate)
+    finally:
+        conn.close()
+
+
+def run_snapshot(db_path, case, profile):
+    state = profile.run("load", snapshot.Snapshot, db_path)
+    months = case["months"]
+    profile.run("date parsing", state.list_months)
+    profile.run("month filter", state.record_count, months)
+    profile.run("nunique", state.distinct_counts, case["columns"], months)
+    with profile.span("value_counts") as stage:
+        state.value_counts("source", months)
+        stage["result"] = counts = state.value_counts("bank_name", months)
+    profile.run("top-N selection", charts.top_n_with_other, counts, "value", "count")
+    profile.run("drill-down filter", state.fetch_rows, case["column"], case["value"], months)
+
+
+RUNNERS = {"pandas": run_pandas, "sqlite": run_sqlite, "snapshot": run_snapshot}
+
+
+# ---- measurement ------------------------------------------------------------
+def peak_resident_memory():
+    """Peak resident set size of this process in bytes (``None`` if unknown)."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def measure_pipeline(db_path, pipeline, case, repeat, warmup, trace_memory):
+    """Run one pipeline ``warmup + repeat`` times (plus a traced run); meant for a fresh process."""
+    if pipeline == "snapshot" and not snapshot.is_fresh(db_path):
+        snapshot.build(db_path)
+    runner = RUNNERS[pipeline]
+    for _ in range(warmup):
+        runner(db_path, case, RenderProfile())
+
+    stages = {}
+    for _ in range(repeat):
+        profile = RenderProfile()
+        runner(db_path, case, profile)
+        for stage in profile.stages:
+            entry = stages.setdefault(stage["stage"], {"seconds": [], "rows": stage["rows"], "bytes": stage["bytes"]})
+            entry["seconds"].append(stage["seconds"])
+    if trace_memory:
+        profile = RenderProfile(trace_memory=True)
+        runner(db_path, case, profile)
+        profile.close()
+        for stage in profile.stages:
+            stages[stage["stage"]]["peak_bytes"] = stage["peak_bytes"]
+    return {"stages": stages, "peak_rss": peak_resident_memory()}
+
+
+def summarize_stage(seconds, rows):
+    seconds = np.asarray(seconds)
+    p50, p90, p99 = np.percentile(seconds, [50, 90, 99])
+    return {
+        "p50": p50, "p90": p90, "p99": p99,
+        "mean": seconds.mean(), "min": seconds.min(), "max": seconds.max(),
+        "rows_per_second": rows / p50 if p50 > 0 else None,
+    }
+
+
+def environment():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "cpus": os.cpu_count(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "sqlite": sqlite3.sqlite_version,
+        "pyarrow": snapshot.pa.__version__ if snapshot.available() else None,
+    }
+
+
+def benchmark(sizes, pipelines, repeat, warmup, trace_memory, seed, data_dir):
+    results = []
+    for rows in sizes:
+        db_path = dataset(data_dir, rows, seed)
+        case = workload(db_path)
+        for pipeline in pipelines:
+            print(f"Running {pipeline} on {rows} rows...", flush=True)
+            entry = {"rows": rows, "pipeline": pipeline, "database_bytes": os.path.getsize(db_path),
+                     "months": case["months"], "drill_down": [case["column"], case["value"]]}
+            # "spawn" so each run starts from an empty heap and its own peak RSS
+            with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+                try:
+                    measured = pool.submit(measure_pipeline, db_path, pipeline, case, repeat, warmup,
+                                           trace_memory).result()
+                except Exception as e:  # out of memory kills the worker; record it and carry on
+                    entry["error"] = f"{type(e).__name__}: {e}"
+                    results.append(entry)
+                    print(f"  failed: {entry['error']}")
+                    continue
+            entry["peak_rss"] = measured["peak_rss"]
+            entry["stages"] = [
+                {"stage": name, **summarize_stage(stage["seconds"], case["rows"]), "samples": len(stage["seconds"]),
+                 "result_rows": stage["rows"], "result_bytes": stage["bytes"], "peak_bytes": stage.get("peak_bytes")}
+                for name, stage in measured["stages"].items()
+            ]
+            results.append(entry)
+            report(entry)
+    return results
+
+
+def report(entry):
+    print(f"  {'stage':<18}{'p50 ms':>11}{'p90 ms':>11}{'p99 ms':>11}{'rows/s':>14}{'peak MB':>10}")
+    for stage in entry["stages"]:
+        peak = stage["peak_bytes"]
+        throughput = stage["rows_per_second"]
+        print(f"  {stage['stage']:<18}{stage['p50'] * 1000:>11.2f}{stage['p90'] * 1000:>11.2f}"
+              f"{stage['p99'] * 1000:>11.2f}{throughput if throughput is not None else float('nan'):>14,.0f}"
+              f"{peak / 1024 ** 2 if peak is not None else float('nan'):>10.1f}")
+    if entry["peak_rss"] is not None:
+        print(f"  peak RSS {entry['peak_rss'] / 1024 ** 2:.0f} MB")
+
+
+def _plain(value):
+    # numpy scalars in the results
+    return value.item() if hasattr(value, "item") else str(value)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the suspect registry dashboard's data path.")
+    parser.add_argument("--rows", type=int, nargs="+", default=DEFAULT_ROWS, help="table sizes to generate and time")
+    parser.add_argument("--pipelines", nargs="+", choices=PIPELINES, default=PIPELINES)
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per pipeline")
+    parser.add_argument("--warmup", type=int, default=1, help="untimed runs before timing")
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc run")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--data-dir", default=DATA_DIR, help="where generated databases are kept")
+    parser.add_argument("--output", help="results file (default: benchmark_results/benchmark-<time>.json next to this script)")
+    parser.add_argument("--generate-only", action="store_true", help="only generate the databases")
+    args = parser.parse_args()
+
+    if args.generate_only:
+        for rows in args.rows:
+            dataset(args.data_dir, rows, args.seed)
+        return
+    pipelines = [p for p in args.pipelines if p != "snapshot" or snapshot.available()]
+    if pipelines != args.pipelines:
+        print("pyarrow is not installed; skipping the snapshot pipeline")
+
+    env = environment()
+    results = benchmark(args.rows, pipelines, args.repeat, args.warmup, not args.no_memory, args.seed, args.data_dir)
+    output = args.output or os.path.join(RESULTS_DIR, f"benchmark-{env['timestamp'].replace(':', '')}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as handle:
+        json.dump({"environment": env, "seed": args.seed, "repeat": args.repeat, "warmup": args.warmup,
+                   "stages": STAGES, "results": results}, handle, indent=2, default=_plain)
+    print(f"\nResults written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+"""Process-wide query cache shared by every Streamlit session.
+
+Streamlit re-executes ``dashboard.py`` on every widget interaction, but
+imported modules live for the whole server process, so a cache kept here is
+shared by all sessions and reruns. Entries are dropped only when the
+database actually changes (file mtime/size or ``PRAGMA data_version``), and
+the cache is bounded in bytes with least-recently-used eviction.
+"""
+import os
+import sqlite3
+import sys
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+import queries
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+
+def estimate_size(value):
+    """Rough resident size of a cached value in bytes."""
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        usage = value.memory_usage(deep=True)
+        return int(usage.sum() if isinstance(usage, pd.Series) else usage)
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return sys.getsizeof(value) + sum(sys.getsizeof(item) for item in value)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(sys.getsizeof(k) + sys.getsizeof(v) for k, v in value.items())
+    return sys.getsizeof(value)
+
+
+def freeze(value):
+    """Make query arguments (which may hold lists) usable as a cache key."""
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(item) for item in value)
+    if isinstance(value, (set, frozenset)):
+        return frozenset(freeze(item) for item in value)
+    if isinstance(value, dict):
+        return tuple(sorted((key, freeze(item)) for key, item in value.items()))
+    return value
+
+
+class DatabaseWatch:
+    """Cheap fingerprint of a database: file mtime/size and ``PRAGMA data_version``."""
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def fingerprint(self):
+        """Identify the current state of the database file."""
+        try:
+            stat = os.stat(self.db_path)
+            file_state = (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            file_state = None
+        with self._lock:
+            try:
+                if self._conn is None:
+                    self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+                # data_version changes whenever another connection commits, which
+                # also covers WAL-mode writes that do not touch the main file.
+                data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+            except sqlite3.Error:
+                self._conn = None
+                data_version = None
+        return file_state, data_version
+
+
+class QueryCache:
+    def __init__(self, db_path, max_bytes=DEFAULT_MAX_BYTES):
+        self.db_path = db_path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.RLock()
+        self._key_locks = {}
+        self._local = threading.local()
+        self._watch = DatabaseWatch(db_path)
+        self._fingerprint = None
+
+    # ---- invalidation -------------------------------------------------
+    def fingerprint(self):
+        return self._watch.fingerprint()
+
+    def validate(self):
+        """Drop every entry if the database changed since the last check."""
+        with self._lock:
+            current = self.fingerprint()
+            if self._fingerprint is not None and current != self._fingerprint:
+                self.clear()
+                self.invalidations += 1
+            self._fingerprint = current
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    # ---- lookup -------------------------------------------------------
+    def connection(self):
+        """Per-thread connection used to compute cache misses."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = queries.connect(self.db_path)
+            self._local.conn = conn
+        return conn
+
+    def get(self, key, compute):
+        """Return the cached value for ``key``, computing it once on a miss.
+
+        Concurrent sessions asking for the same key wait for a single
+        computation instead of each hitting the database.
+        """
+        key = freeze(key)
+        self.validate()
+        with self._lock:
+            if key in self._entries:
+                return self._hit(key)
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        with key_lock:
+            with self._lock:
+                if key in self._entries:
+                    return self._hit(key)
+                self.misses += 1
+                fingerprint = self._fingerprint
+            value = compute()
+            with self._lock:
+                self._key_locks.pop(key, None)
+                # Skip storing a result computed against a database that has
+                # changed underneath us (the next lookup clears the rest).
+                if fingerprint == self.fingerprint():
+                    self._store(key, value)
+        return _copy(value)
+
+    def query(self, func, *args, **kwargs):
+        """Run a query function ``func(conn, *args, **kwargs)`` through the cache."""
+        key = (func.__module__, func.__name__, args, kwargs)
+        return self.get(key, lambda: func(self.connection(), *args, **kwargs))
+
+    def _hit(self, key):
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return _copy(self._entries[key][0])
+
+    def _store(self, key, value):
+        size = estimate_size(value)
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._bytes -= self._entries.pop(key)[1]
+        self._entries[key] = (value, size)
+        self._bytes += size
+        while self._bytes > self.max_bytes:
+            _, (_, evicted) = self._entries.popitem(last=False)
+            self._bytes -= evicted
+            self.evictions += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+def _copy(value):
+    # Cached frames are shared across sessions, so callers get their own copy.
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return value.copy()
+    if isinstance(value, list):
+        return list(value)
+    return value
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_cache(db_path, max_bytes=DEFAULT_MAX_BYTES):
+    """Return the process-wide cache for ``db_path``."""
+    with _caches_lock:
+        cache = _caches.get(db_path)
+        if cache is None:
+            cache = _caches[db_path] = QueryCache(db_path, max_bytes)
+        return cache
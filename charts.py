@@ -0,0 +1,44 @@
+"""Chart data reduction for high-cardinality bar charts.
+
+With hundreds of banks or sources, sending every category to Plotly makes
+each figure's JSON large and slow to draw. Charts keep the ``top_n`` largest
+categories and fold the rest into one "Other" bar, and every figure is held
+to a byte budget: if its JSON is still too large, ``top_n`` is halved until
+it fits.
+
+Plotly has no WebGL bar trace, so bars stay SVG; with the category count
+capped there are too few shapes for WebGL to help.
+"""
+import pandas as pd
+import plotly.express as px
+
+DEFAULT_TOP_N = 15
+MAX_PAYLOAD_BYTES = 100_000
+OTHER_LABEL = "Other"
+
+
+def top_n_with_other(frame, label, value, top_n=DEFAULT_TOP_N):
+    """The ``top_n`` largest rows of ``frame`` plus one row summing the rest."""
+    if len(frame) <= top_n:
+        return frame.reset_index(drop=True)
+    frame = frame.sort_values(value, ascending=False, kind="stable")
+    rest = frame.iloc[top_n:]
+    other = {column: [OTHER_LABEL] for column in frame.columns}
+    other[label] = [f"{OTHER_LABEL} ({len(rest)})"]
+    other[value] = [rest[value].sum()]
+    return pd.concat([frame.head(top_n), pd.DataFrame(other)], ignore_index=True)
+
+
+def payload_bytes(fig):
+    """Size of the figure's JSON; remembered on the figure for the render profile."""
+    fig._payload_bytes = len(fig.to_json())
+    return fig._payload_bytes
+
+
+def bar(frame, label, value, top_n=DEFAULT_TOP_N, max_bytes=MAX_PAYLOAD_BYTES, **bar_kwargs):
+    """``px.bar`` over the top categories, shrunk until the figure fits ``max_bytes``."""
+    while True:
+        fig = px.bar(top_n_with_other(frame, label, value, top_n), **bar_kwargs)
+        if top_n <= 1 or payload_bytes(fig) <= max_bytes:
+            return fig
+        top_n //= 2
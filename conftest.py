@@ -0,0 +1,39 @@
+import sqlite3
+
+import pytest
+
+import queries
+
+COLUMNS = ["index", "bank_name", "source", queries.DATE_COLUMN] + queries.IDENTIFIER_COLUMNS
+
+
+@pytest.fixture
+def registry(tmp_path):
+    """Path of an empty ``new_suspect_file2`` database shaped like the real one."""
+    path = str(tmp_path / "registry.db")
+    conn = sqlite3.connect(path)
+    definitions = ", ".join(f"{queries.quote(column)} {'INTEGER' if column == 'index' else 'TEXT'}"
+                            for column in COLUMNS)
+    conn.execute(f"CREATE TABLE {queries.quote(queries.TABLE)} ({definitions})")
+    conn.commit()
+    conn.close()
+    return path
+
+
+def insert(db_path, rows):
+    """Append ``rows`` (dicts keyed by column name, missing columns NULL)."""
+    conn = sqlite3.connect(db_path)
+    with conn:
+        conn.executemany(
+            f"INSERT INTO {queries.quote(queries.TABLE)} ({', '.join(map(queries.quote, COLUMNS))}) "
+            f"VALUES ({', '.join('?' for _ in COLUMNS)})",
+            [[row.get(column) for column in COLUMNS] for row in rows],
+        )
+    conn.close()
+
+
+def execute(db_path, sql, params=()):
+    conn = sqlite3.connect(db_path)
+    with conn:
+        conn.execute(sql, params)
+    conn.close()
@@ -1,15 +1,30 @@
 import streamlit as st
-import plotly.express as px
 import pandas as pd
-import sqlite3
+import math
 import warnings
-import time
+
+import charts
+import distinct
+import pagination
+import queries
+import rollups
+import snapshot
+from cache import get_cache
+from incremental import get_aggregates
+from linkage import MAX_LINKED_VALUES, get_linkage
+from lookup import MAX_RESULTS, MIN_PREFIX, get_index
+from profiling import RenderProfile, configure_logging
 
 warnings.filterwarnings('ignore')
 
 # Page Configuration
 st.set_page_config(page_title="📊 Suspect Registry Dashboard", page_icon="📈", layout="wide")
 
+# ⏱️ Render profile: every stage of this rerun is timed (and memory-traced while the panel is open)
+# Slow reruns are logged to stderr; SUSPECT_REGISTRY_PROFILE_LOG=INFO logs every rerun
+configure_logging()
+profile = RenderProfile(trace_memory=st.session_state.get("profile_panel", False))
+
 # Inject Custom CSS for Styling
 st.markdown("""
     <style>
@@ -23,9 +38,30 @@ st.markdown("""
         font-weight: 600;
     }
     [data-testid="stSidebar"] .stMarkdown h1,
-    [data-testid="stSidebar"] .stMarkdown h2 {
+    [data-testid="stSidebar"] .stMarkdown h2,
+    [data-testid="stSidebar"] .stMarkdown h3,
+    [data-testid="stSidebar"] .stMarkdown h4 {
         color: white;
     }
+    [data-testid="collapsedControl"] {
+        background-color: #2c333b !important;
+        border: 1px solid #555 !important;
+        box-shadow: 0 2px 4px rgba(0,0,0,0.6);
+    }
+    [data-testid="collapsedControl"] svg {
+        stroke: #38bdf8 !important;
+        width: 22px;
+        height: 18px;
+    }
+    .block-container:has([data-testid="stSidebar"]) {
+        box-shadow: none !important;
+    }
+    button:disabled {
+        background-color: #2c333b !important;
+        color: #38bdf8 !important;
+        border: 1px solid #444 !important;
+        opacity: 1 !important;
+    }
 
     /* Form Input Customization */
     .stSelectbox > div, .stMultiSelect > div, .stTextInput > div, .stNumberInput > div {
@@ -71,6 +107,24 @@ st.markdown("""
         font-size: 26px;
         color: #38bdf8;
     }
+
+    /* Dark Mode Scorecards */
+    .dark-scorecard {
+        background-color: #1f2630;
+        padding: 12px 18px;
+        border-radius: 12px;
+        margin-bottom: 10px;
+        color: #ffffff;
+        box-shadow: 0 2px 6px rgba(0,0,0,0.3);
+    }
+    .dark-scorecard .bank-name {
+        font-size: 16px;
+        font-weight: 600;
+    }
+    .dark-scorecard .count {
+        font-size: 26px;
+        color: #38bdf8;
+    }
     </style>
 """, unsafe_allow_html=True)
 
@@ -84,60 +138,6 @@ st.markdown(f"""
     </div>
 """, unsafe_allow_html=True)
 
-time.sleep(1)
-
-
-# Inject Dark Theme to Sidebar
-st.markdown("""
-    <style>
-    [data-testid="stSidebar"] {
-        background-color: #1f2630;
-        color: white;
-    }
-    [data-testid="stSidebar"] label {
-        color: #38bdf8;
-        font-weight: 600;
-    }
-    [data-testid="stSidebar"] .stMarkdown h1,
-    [data-testid="stSidebar"] .stMarkdown h2,
-    [data-testid="stSidebar"] .stMarkdown h3,
-    [data-testid="stSidebar"] .stMarkdown h4 {
-        color: white;
-    }
-    .stSelectbox > div, .stMultiSelect > div, .stTextInput > div, .stNumberInput > div {
-        background-color: #2c333b !important;
-        color: white !important;
-        border-radius: 10px;
-        border: 1px solid #444;
-    }
-    .css-1wa3eu0-placeholder, .css-1okebmr-indicatorSeparator {
-        color: #ccc !important;
-    }
-    .block-container:has([data-testid="stSidebar"]) {
-        box-shadow: none !important;
-    }
-    button:disabled {
-        background-color: #2c333b !important;
-        color: #38bdf8 !important;
-        border: 1px solid #444 !important;
-        opacity: 1 !important;
-    }
-    [data-testid="collapsedControl"] {
-        background-color: #2c333b !important;
-        border: 1px solid #555 !important;
-        box-shadow: 0 2px 4px rgba(0,0,0,0.6);
-    }
-    [data-testid="collapsedControl"] svg {
-        stroke: #38bdf8 !important;
-        width: 22px;
-        height: 18px;
-    }
-    </style>
-""", unsafe_allow_html=True)
-
-
-time.sleep(1)
-
 # Sidebar Navigation
 st.sidebar.markdown("---")
 st.sidebar.button("📈 Dashboard", disabled=True)
@@ -146,66 +146,157 @@ st.sidebar.markdown("---")
 # 📂 Load from SQLite DB
 db_path = "D:/RRU/Sem 8/I4C-BANK-SUSPECT REGISTRY-PROJECT/I4C-BANK-SUSPECT REGISTRY-PROJECT/new_suspect_file2.db"
 try:
-    conn = sqlite3.connect(db_path)
-
-    df = pd.read_sql_query("SELECT * FROM new_suspect_file2", conn)
-
-
-    conn.close()
+    # Shared across every session and rerun; refreshed only when the DB changes
+    with profile.span("connect") as stage:
+        cache = get_cache(db_path)
+        stage["result"] = columns = cache.query(queries.table_columns)
+    if not columns:
+        raise ValueError(f"table {queries.TABLE} not found")
+
+    # ⚡ Incremental mode: fold only rows added since the last refresh
+    aggregates = None
+    if st.sidebar.toggle("⚡ Incremental Refresh", key="incremental_mode"):
+        aggregates = get_aggregates(db_path)
+        st.sidebar.button("🔄 Refresh Data")
+        new_rows = aggregates.refresh()
+        st.sidebar.caption(f"Picked up {new_rows} new rows in "
+                           f"{aggregates.last_refresh['seconds'] * 1000:.0f} ms")
+
+    # 🧊 Columnar snapshot: compact Parquet copy of the table, rebuilt when the DB changes
+    columnar = None
+    if snapshot.available() and st.sidebar.toggle("🧊 Columnar Snapshot", key="snapshot_mode"):
+        columnar = snapshot.get_snapshot(db_path)
+        report = columnar.report
+        st.sidebar.caption(f"{report['origin'].title()} {report['rows']} rows in {report['seconds']:.2f} s · "
+                           f"RSS {report['rss_before'] / 1024 ** 2:.0f} → {report['rss_after'] / 1024 ** 2:.0f} MB")
+        if columnar.fingerprint != snapshot.db_fingerprint(db_path):
+            st.sidebar.caption("⏳ Database changed: showing the previous snapshot while it rebuilds")
+
+    selected_months = None
+    # Monthly rollup tables (see rollups.py) answer counts without touching the records
+    rollup_ready = cache.query(rollups.is_available)
+
+    def summarize(func, *args, where=None, **kwargs):
+        # Answer from the incremental state, snapshot or rollup when they cover the query, else from SQLite
+        in_memory = [state for state in (aggregates, columnar) if state is not None]
+        for state in in_memory + ([rollups] if rollup_ready else []):
+            if state.answers(func, *args):
+                if where is not None:
+                    kwargs["months"] = selected_months
+                if state is rollups:
+                    return cache.query(getattr(rollups, func.__name__), *args, **kwargs)
+                return getattr(state, func.__name__)(*args, **kwargs)
+        if where is not None:
+            kwargs["where"] = where
+        return cache.query(func, *args, **kwargs)
+
+    def toggle_state(key):
+        st.session_state[key] = not st.session_state.get(key, False)
+
+    def value_list(key, values, label, page_size=25):
+        # Long lists of values are shown one page at a time
+        pages = max(1, math.ceil(len(values) / page_size))
+        page = st.number_input(f"Page (of {pages})", min_value=1, max_value=pages, value=1, key=f"{key}_page")
+        start = (page - 1) * page_size
+        st.dataframe(pd.DataFrame({label: values[start:start + page_size]}), hide_index=True)
+
+    def paginated_table(key, predicate):
+        # Matching records, one keyset page at a time, sorted and projected in SQLite
+        controls = st.columns([3, 2, 1, 1])
+        shown = controls[0].multiselect("🧱 Columns", columns, default=columns, key=f"{key}_columns")
+        sort_by = controls[1].selectbox("↕️ Sort By", ["Insertion Order"] + columns, key=f"{key}_sort")
+        descending = controls[2].toggle("Descending", key=f"{key}_descending")
+        page_size = controls[3].selectbox("Rows", pagination.PAGE_SIZES, key=f"{key}_size")
+        sort_column = None if sort_by == "Insertion Order" else sort_by
+
+        # Start again from the first page whenever the query itself changes
+        signature = repr((predicate, shown, sort_column, descending, page_size))
+        if st.session_state.get(f"{key}_signature") != signature:
+            st.session_state[f"{key}_signature"] = signature
+            st.session_state[f"{key}_cursors"] = [None]
+        cursors = st.session_state[f"{key}_cursors"]
+
+        page = profile.run(f"{key} page", cache.query, pagination.fetch_page,
+                           predicate, shown, sort_column, descending, cursors[-1], page_size)
+        following = pagination.next_cursor(page, page_size)
+        total = profile.run(f"{key} count", cache.query, queries.record_count, predicate)
+        with profile.span(f"{key} table render"):
+            st.dataframe(pagination.visible(page, page_size), use_container_width=True)
+
+        nav = st.columns([1, 1, 3, 1, 1])
+        nav[0].button("⬅️ Previous", key=f"{key}_previous", disabled=len(cursors) == 1, on_click=cursors.pop)
+        nav[1].button("Next ➡️", key=f"{key}_next", disabled=following is None,
+                      on_click=cursors.append, args=(following,))
+        nav[2].caption(f"Page {len(cursors)} of {max(1, math.ceil(total / page_size))} · {total} records")
+
+        # 📤 Streaming export: written to disk chunk by chunk, built only when the button is clicked,
+        # and deleted once read back (Streamlit still holds the finished file in memory to serve it)
+        export_format = nav[3].selectbox("Format", ["CSV", "Parquet"], key=f"{key}_format",
+                                         label_visibility="collapsed").lower()
+        nav[4].download_button("📤 Export", key=f"{key}_export", disabled=not shown,
+                               data=lambda: pagination.export_bytes(db_path, predicate, shown, export_format,
+                                                                    sort_column, descending),
+                               file_name=f"suspects.{export_format}",
+                               mime="text/csv" if export_format == "csv" else "application/octet-stream")
 
     # Dashboard Header Metrics
     col1, col2, col3 = st.columns(3)
-    col1.metric("📄 Number of Records", len(df))
+    col1.metric("📄 Number of Records", profile.run("record count", summarize, queries.record_count))
 
-    if "bank_name" in df.columns:
-        if col2.button("🏦 Unique Banks: " + str(df["bank_name"].nunique())):
+    if "bank_name" in columns:
+        col2.button("🏦 Unique Banks: " + str(profile.run("bank count", summarize, queries.distinct_count, "bank_name")),
+                    on_click=toggle_state, args=("show_banks",))
+        if st.session_state.get("show_banks"):
             st.subheader("🏦 List of Unique Banks")
-            st.write(df["bank_name"].unique())
+            value_list("banks", profile.run("bank list", summarize, queries.distinct_values, "bank_name"), "Bank")
 
-    if "source" in df.columns:
-        if col3.button("📌 Unique Sources: " + str(df["source"].nunique())):
+    if "source" in columns:
+        col3.button("📌 Unique Sources: " + str(profile.run("source count", summarize, queries.distinct_count, "source")),
+                    on_click=toggle_state, args=("show_sources",))
+        if st.session_state.get("show_sources"):
             st.subheader("📌 List of Unique Sources")
-            st.write(df["source"].unique())
+            value_list("sources", profile.run("source list", summarize, queries.distinct_values, "source"), "Source")
 
     # Date filtering
-    if "Date" in df.columns:
-        df["Date"] = pd.to_datetime(df["Date"], errors='coerce')
-        df = df.dropna(subset=["Date"])
-        df["Month_Year"] = df["Date"].dt.to_period("M").astype(str)
-        unique_months_years = sorted(df["Month_Year"].unique())
+    where = None
+    if queries.DATE_COLUMN in columns:
+        unique_months_years = profile.run("months", summarize, queries.list_months)
 
         selected_months = st.sidebar.multiselect("📅 Select Month and Year", options=["All"] + unique_months_years, default=["All"])
-        if "All" not in selected_months:
-            df = df[df["Month_Year"].isin(selected_months)]
+        where = queries.month_filter(selected_months)
+
+        # Dates SQLite can't read (anything but YYYY-MM-DD...) never match a month
+        unparsed, examples = cache.query(queries.unparsed_dates)
+        if unparsed:
+            st.sidebar.warning(f"⚠️ {unparsed} records have a Date that is not in YYYY-MM-DD form "
+                               f"(e.g. {', '.join(map(str, examples))}) and are left out of month filters.")
 
     # Unique Records Count
     st.subheader("📌 Unique Records Count")
 
-    st.markdown("""
-        <style>
-        .dark-card {
-            background-color: #1f2630;
-            padding: 12px 18px;
-            border-radius: 12px;
-            margin-bottom: 10px;
-            color: #ffffff;
-            box-shadow: 0 2px 6px rgba(0,0,0,0.3);
-        }
-        .dark-card .column-name {
-            font-size: 16px;
-            font-weight: 600;
-        }
-        .dark-card .value {
-            font-size: 26px;
-            color: #38bdf8;
-        }
-        </style>
-    """, unsafe_allow_html=True)
-
    # Exclude certain columns
-    excluded_columns = ["Date", "Month_Year"]
-    unique_counts = df.drop(columns=excluded_columns, errors='ignore').nunique().reset_index()
-    unique_counts.columns = ["Column", "Unique Values"]
+    counted_columns = [c for c in columns if c not in queries.EXCLUDED_COLUMNS]
+
+    # 🧮 Distinct counting: exact scan, exact per-column across a process pool, or HyperLogLog estimates
+    counting_mode = st.sidebar.radio("🧮 Distinct Counting", ["Exact", "Exact (Parallel)", "Approximate"],
+                                     key="counting_mode")
+    with profile.span(f"unique counts ({counting_mode.lower()})") as stage:
+        if counting_mode == "Approximate":
+            counting_error = st.sidebar.select_slider("🎯 Target Error", options=[0.005, 0.01, 0.02, 0.05],
+                                                      value=0.01, format_func=lambda error: f"±{error:.1%}")
+            sketches = distinct.get_sketches(db_path, counting_error)
+            sketches.refresh()
+            unique_counts = sketches.distinct_counts(counted_columns, selected_months)
+            unique_counts["Kind"] = f"Estimated (±{sketches.error:.1%})"
+        elif counting_mode == "Exact (Parallel)":
+            unique_counts = cache.get(("parallel_distinct_counts", counted_columns, where),
+                                      lambda: distinct.parallel_distinct_counts(db_path, counted_columns, where))
+            unique_counts["Kind"] = "Exact"
+        else:
+            unique_counts = summarize(queries.distinct_counts, counted_columns, where=where)
+            unique_counts["Kind"] = "Exact"
+        stage["result"] = unique_counts
+    estimated = counting_mode == "Approximate"
 
     # 🆕 Display Unique Fields as Boxes in a *5-Column Grid Layout*
     st.markdown("### 🧾 Unique Fields")
@@ -215,81 +306,71 @@ try:
 
     for row in rows:
         cols = st.columns(num_cols)
-        for idx, (col_name, unique_value) in enumerate(zip(row["Column"], row["Unique Values"])):
+        for idx, (col_name, unique_value, kind) in enumerate(zip(row["Column"], row["Unique Values"], row["Kind"])):
             with cols[idx]:
                 st.markdown(f"""
                     <div style='background-color: #1f2630; padding: 12px; border-radius: 12px; 
                                 text-align: center; margin-bottom: 10px; color: #ffffff; 
                                 box-shadow: 0 2px 6px rgba(0,0,0,0.3); width: 100%;'>
                         <div style='font-size: 14px; font-weight: 600;'>{col_name}</div>
-                        <div style='font-size: 24px; color: #38bdf8;'>{unique_value}</div>
+                        <div style='font-size: 24px; color: #38bdf8;'>{"≈" if estimated else ""}{unique_value}</div>
+                        <div style='font-size: 11px; color: #9ca3af;'>{kind}</div>
                     </div>
                 """, unsafe_allow_html=True)
 
     # Bar Chart
-    fig = px.bar(unique_counts, x="Column", y="Unique Values", text="Unique Values",
-                 labels={"Column": "Column", "Unique Values": "Unique Values"},
-                 template="plotly_dark", color_discrete_sequence=["#4CAF50"], height=400)
-    st.plotly_chart(fig, use_container_width=True)
+    fig = profile.run("unique chart build", charts.bar, unique_counts, "Column", "Unique Values", top_n=len(unique_counts),
+                      x="Column", y="Unique Values", text="Unique Values", color="Kind",
+                      labels={"Column": "Column", "Unique Values": "Unique Values"},
+                      template="plotly_dark", color_discrete_sequence=["#FF9800" if estimated else "#4CAF50"], height=400)
+    with profile.span("unique chart render"):
+        st.plotly_chart(fig, use_container_width=True)
 
     # Market Overview
     st.subheader("📊 Market Overview")
+    # Largest categories only, the rest folded into "Other" to keep each figure's payload small
+    bars_per_chart = st.sidebar.slider("📊 Bars per Chart", min_value=5, max_value=50, value=charts.DEFAULT_TOP_N)
+    # Bank counts are computed once and shared by both bank charts and the scorecard
+    top_bank = profile.run("bank counts", summarize, queries.value_counts, "bank_name", where=where)
+    top_bank.columns = ["Bank", "Count"]
     col4, col5 = st.columns(2)
 
     with col4:
         st.subheader("📌 Records by Source")
-        records_by_source = df["source"].value_counts().reset_index()
+        records_by_source = profile.run("source counts", summarize, queries.value_counts, "source", where=where)
         records_by_source.columns = ["Source", "Records"]
-        fig_source = px.bar(records_by_source, x="Source", y="Records", text="Records",
-                            template="plotly_dark", color_discrete_sequence=["#008CBA"],
-                            labels={"Source": "Source", "Records": "Records Count"}, height=400)
-        st.plotly_chart(fig_source, use_container_width=True)
+        fig_source = profile.run("source chart build", charts.bar, records_by_source, "Source", "Records",
+                                 top_n=bars_per_chart, x="Source", y="Records", text="Records",
+                                 template="plotly_dark", color_discrete_sequence=["#008CBA"],
+                                 labels={"Source": "Source", "Records": "Records Count"}, height=400)
+        with profile.span("source chart render"):
+            st.plotly_chart(fig_source, use_container_width=True)
 
     with col5:
         st.subheader("🏦 Records by Bank")
-        records_by_bank = df["bank_name"].value_counts().reset_index()
-        records_by_bank.columns = ["Bank", "Records"]
-        fig_bank = px.bar(records_by_bank, x="Bank", y="Records", text="Records",
-                          template="plotly_dark", color_discrete_sequence=["#FF9800"],
-                          labels={"Bank": "Bank", "Records": "Records Count"}, height=400)
-        st.plotly_chart(fig_bank, use_container_width=True)
+        fig_bank = profile.run("bank chart build", charts.bar, top_bank, "Bank", "Count",
+                               top_n=bars_per_chart, x="Bank", y="Count", text="Count",
+                               template="plotly_dark", color_discrete_sequence=["#FF9800"],
+                               labels={"Bank": "Bank", "Count": "Records Count"}, height=400)
+        with profile.span("bank chart render"):
+            st.plotly_chart(fig_bank, use_container_width=True)
 
     # Top Contributing Banks
     st.markdown("## 🥇 Top Contributing Banks")
 
-    st.markdown("""
-        <style>
-            .dark-scorecard {
-                background-color: #1f2630;
-                padding: 12px 18px;
-                border-radius: 12px;
-                margin-bottom: 10px;
-                color: #ffffff;
-                box-shadow: 0 2px 6px rgba(0,0,0,0.3);
-            }
-            .dark-scorecard .bank-name {
-                font-size: 16px;
-                font-weight: 600;
-            }
-            .dark-scorecard .count {
-                font-size: 26px;
-                color: #38bdf8;
-            }
-        </style>
-    """, unsafe_allow_html=True)
-
     col6, col7 = st.columns([3, 1])
 
     with col6:
-        top_bank = df["bank_name"].value_counts().reset_index()
-        top_bank.columns = ["Bank", "Count"]
-        fig_top = px.bar(
-            top_bank, x="Count", y="Bank",
+        fig_top = profile.run(
+            "top banks chart build", charts.bar,
+            top_bank, "Bank", "Count", top_n=bars_per_chart,
+            x="Count", y="Bank",
             orientation="h", text="Count",
             template="plotly_dark", height=400,
             color_discrete_sequence=["#38bdf8"]
         )
-        st.plotly_chart(fig_top, use_container_width=True)
+        with profile.span("top banks chart render"):
+            st.plotly_chart(fig_top, use_container_width=True)
 
     with col7:
         st.markdown("### 🔢 Scorecard")
@@ -304,18 +385,90 @@ try:
                 </div>
             """, unsafe_allow_html=True)
 
+    # Linked Suspect Clusters: records sharing any phone, email, account number or CIN
+    st.markdown("## 🔗 Top Linked Clusters")
+    if st.checkbox("🔗 Find Linked Clusters", key="show_clusters"):
+        # An identifier tying together more distinct identifiers than this is a hub, not a link
+        max_links = st.sidebar.select_slider("🔗 Hub Threshold", [10, 25, 50, 100, 250, 1000],
+                                             value=MAX_LINKED_VALUES, key="hub_threshold")
+        with profile.span("linked clusters") as stage:
+            record_linkage = get_linkage(db_path, max_links)
+            record_linkage.refresh()
+            stage["result"] = top_clusters = record_linkage.top_clusters(limit=10)
+        hubs = record_linkage.hubs(limit=10)
+        if not top_clusters and not hubs:
+            st.info("No records share an identifier.")
+        else:
+            groups = {f"Cluster {cluster['cluster']}": cluster for cluster in top_clusters}
+            groups.update({f"Hub {hub['column']}: {hub['value']}": hub for hub in hubs})
+            cluster_table = pd.DataFrame({
+                "Cluster": list(groups),
+                "Records": [group["records"] for group in groups.values()],
+                "Banks Involved": [len(group["banks"]) for group in groups.values()],
+                "Banks": [", ".join(map(str, group["banks"])) for group in groups.values()],
+            })
+            st.dataframe(cluster_table, hide_index=True, use_container_width=True)
+            if hubs:
+                st.caption(f"Hubs link more than {max_links} other identifiers each, so they are not used "
+                           f"to join records; open one to see every record carrying it.")
+            opened = st.selectbox("📂 Open Cluster", list(groups))
+            paginated_table("cluster", queries.rowid_filter(groups[opened]["rowids"]))
+
     # Sidebar: Advanced Filtering
     st.sidebar.header("🔎 Advanced Filtering")
-    selected_column = st.sidebar.selectbox("📌 Select Column for Analysis",
-                                           ["account_holder_name", "email_address_of_suspect", "phone_number_of_suspect",
-                                            "ifsc_code", "account_number", "cin_number"])
-
-    if selected_column in df.columns:
-        top_values = df[selected_column].value_counts().head(10).index.tolist()
+    selected_column = st.sidebar.selectbox("📌 Select Column for Analysis", queries.IDENTIFIER_COLUMNS)
+    search_text = st.sidebar.text_input("⌨️ Search Identifier", placeholder="Phone, email, account, IFSC or CIN")
+    search_scope = st.sidebar.selectbox("🎯 Search In", ["All Identifiers"] + queries.IDENTIFIER_COLUMNS)
+
+    if search_text:
+        # Indexed lookup: exact and prefix matches on normalized identifiers, across all months
+        identifier_index = profile.run("index load", get_index, db_path)
+        profile.run("index refresh", identifier_index.refresh)
+        with profile.span("identifier lookup") as stage:
+            scope = None if search_scope == "All Identifiers" else [search_scope]
+            # One match more than is listed tells whether a column's list was cut short
+            matches = identifier_index.search_all(search_text, limit=MAX_RESULTS + 1, columns=scope)
+            truncated = [column for column, rowids in matches.items() if len(rowids) > MAX_RESULTS]
+            matches = {column: rowids[:MAX_RESULTS] for column, rowids in matches.items()}
+            stage["result"] = matched_rowids = sorted(set().union(*matches.values()))
+        lookup_ms = profile.stages[-1]["seconds"] * 1000
+        st.write(f"### 🔍 Records matching {search_text}")
+        found = " · ".join(f"{column}: {len(rowids)}{'+' if column in truncated else ''}"
+                           for column, rowids in matches.items()) or "no identifier matched"
+        st.caption(f"{len(matched_rowids)} records in {lookup_ms:.2f} ms ({found})")
+        if len(search_text.strip()) < MIN_PREFIX:
+            st.caption(f"Prefix matching starts at {MIN_PREFIX} characters; showing whole identifiers only.")
+        if truncated:
+            st.warning(f"Only the first {MAX_RESULTS} matches per column are listed; "
+                       f"type more of the identifier to narrow the search.")
+        paginated_table("search", queries.rowid_filter(matched_rowids))
+
+    elif selected_column in columns:
+        top_values = profile.run("top values", summarize, queries.value_counts, selected_column,
+                                 where=where, limit=10)["value"].tolist()
         selected_value = st.sidebar.selectbox("🔍 Select Most Repeated Value", top_values)
-        filtered_data = df[df[selected_column] == selected_value]
+        # Full rows are only fetched here, one page at a time, for the drill-down table
         st.write(f"### 🔍 Showing data for {selected_column}: {selected_value}")
-        st.dataframe(filtered_data)
+        paginated_table("drilldown", queries.conjoin(where, queries.column_filter(selected_column, selected_value)))
+
+    # Sidebar: Shared Cache Statistics
+    stats = cache.stats()
+    st.sidebar.caption(f"🗄️ Cache: {stats['hits']} hits · {stats['misses']} misses · "
+                       f"{stats['entries']} entries · {stats['bytes'] / 1024 ** 2:.1f} MB")
 
 except Exception as e:
-    st.error(f"❌ Error loading database: {e}")
\ No newline at end of file
+    st.error(f"❌ Error loading database: {e}")
+finally:
+    # st.rerun, st.stop or a newer rerun interrupt the page with a BaseException that skips
+    # profile.finish() below, so release memory tracing here (finish then only reports)
+    profile.close()
+
+# 🐞 Render Profile: per-stage timings, sizes and memory of this rerun (also logged as JSON)
+summary = profile.finish()
+if st.sidebar.toggle("🐞 Render Profile", key="profile_panel"):
+    st.sidebar.caption(f"Rerun took {summary['seconds']:.2f} s · RSS {summary['rss_start'] / 1024 ** 2:.0f} → "
+                       f"{summary['rss_end'] / 1024 ** 2:.0f} MB")
+    if summary["slow"]:
+        st.sidebar.warning(f"Slow rerun: over {profile.slow_rerun:.1f} s")
+    st.sidebar.dataframe(profile.frame(), hide_index=True, use_container_width=True)
+    st.sidebar.caption("Memory peaks are process-wide: they include other sessions running at the same time.")
\ No newline at end of file
@@ -0,0 +1,189 @@
+"""Distinct counting for the "Unique Fields" cards.
+
+Two strategies besides the single ``COUNT(DISTINCT ...)`` scan in
+:mod:`queries`:
+
+* **Exact, parallel** - one ``COUNT(DISTINCT column)`` per column, spread
+  over a thread pool where every worker keeps its own SQLite connection.
+  ``sqlite3`` releases the GIL while a query runs, so the scans overlap,
+  and unlike worker processes, threads never re-import Streamlit's
+  ``__main__`` (the whole dashboard script).
+* **Approximate** - HyperLogLog sketches kept per (column, month). A sketch
+  is a few kilobytes whatever the cardinality, sketches for several months
+  merge by taking register maxima, so a sidebar month selection is answered
+  by merging sketches instead of rescanning rows. The store is an
+  :class:`incremental.WatermarkFollower`, so a refresh only hashes new rows.
+
+Values are hashed from the raw SQLite values, never from a pandas column
+whose dtype depends on whether a chunk happened to contain NULLs.
+"""
+import math
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+import queries
+from incremental import WatermarkFollower, shared
+
+DEFAULT_ERROR = 0.01
+CHUNK_SIZE = 100_000
+MAX_WORKERS = 4
+
+
+# ---- exact, parallel --------------------------------------------------------
+_local = threading.local()
+
+
+def _count_distinct(db_path, column, where):
+    connections = _local.__dict__.setdefault("connections", {})
+    conn = connections.get(db_path)
+    if conn is None:
+        conn = connections[db_path] = queries.connect(db_path)
+    return queries.distinct_count(conn, column, where)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="distinct")
+        return _pool
+
+
+def parallel_distinct_counts(db_path, columns, where=None):
+    """Exact distinct counts with one column per worker thread."""
+    pool = _get_pool()
+    futures = [pool.submit(_count_distinct, db_path, column, where) for column in columns]
+    return pd.DataFrame({"Column": columns, "Unique Values": [future.result() for future in futures]})
+
+
+# ---- approximate ------------------------------------------------------------
+def precision_for(error):
+    """HyperLogLog precision whose standard error is at most ``error``."""
+    registers = (1.04 / error) ** 2
+    return min(max(math.ceil(math.log2(registers)), 4), 18)
+
+
+def canonical(value):
+    """One text form per value as SQLite's ``DISTINCT`` sees it.
+
+    ``123`` and ``123.0`` are the same value there, ``'123'`` is another.
+    """
+    if isinstance(value, str):
+        return value
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return f"\x1f{value}"  # marked so 123 and "123" stay apart
+
+
+def hash_values(values):
+    """Stable 64-bit hashes of the non-NULL ``values`` (the same in every process and run)."""
+    texts = np.array([canonical(value) for value in values if value is not None], dtype=object)
+    return pd.util.hash_array(texts)
+
+
+class HyperLogLog:
+    def __init__(self, precision):
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    @property
+    def error(self):
+        return 1.04 / math.sqrt(len(self.registers))
+
+    def add_hashes(self, hashes):
+        if len(hashes) == 0:
+            return
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        p = np.uint64(self.precision)
+        index = (hashes >> np.uint64(64 - self.precision)).astype(np.int64)
+        rest = hashes << p
+        # Rank = position of the leftmost 1-bit in the remaining 64 - p bits
+        width = 64 - self.precision
+        bit_length = np.zeros(len(rest), dtype=np.int64)
+        nonzero = rest != 0
+        bit_length[nonzero] = np.floor(np.log2(rest[nonzero].astype(np.float64))).astype(np.int64) + 1
+        rank = np.where(nonzero, 64 - bit_length + 1, width + 1).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+
+    def merge(self, other):
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def copy(self):
+        sketch = HyperLogLog(self.precision)
+        sketch.registers[:] = self.registers
+        return sketch
+
+    def count(self):
+        m = len(self.registers)
+        alpha = {16: 0.673, 32: 0.697, 64: 0.709}.get(m, 0.7213 / (1 + 1.079 / m))
+        estimate = alpha * m * m / np.sum(np.power(2.0, -self.registers.astype(np.float64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if estimate <= 2.5 * m and zeros:
+            # Small-range correction (linear counting)
+            estimate = m * math.log(m / zeros)
+        return int(round(estimate))
+
+
+class SketchStore(WatermarkFollower):
+    """HyperLogLog sketches per (column, month), refreshed from new rowids."""
+
+    def __init__(self, db_path, precision=precision_for(DEFAULT_ERROR), chunk_size=CHUNK_SIZE):
+        self.precision = precision
+        super().__init__(db_path, chunk_size)
+
+    @property
+    def error(self):
+        return 1.04 / math.sqrt(1 << self.precision)
+
+    def clear(self):
+        self.columns = []
+        self.sketches = {}
+        self.months = set()
+
+    def select(self, columns):
+        self.columns = [column for column in columns if column not in queries.EXCLUDED_COLUMNS]
+        month = (f"strftime('%Y-%m', {queries.quote(queries.DATE_COLUMN)})"
+                 if queries.DATE_COLUMN in columns else "NULL")
+        return [month] + [queries.quote(column) for column in self.columns]
+
+    def fold(self, chunk):
+        by_month = defaultdict(list)
+        for row in chunk:
+            by_month[row[1]].append(row)
+        for month, rows in by_month.items():
+            self.months.add(month)
+            for position, column in enumerate(self.columns, start=2):
+                sketch = self.sketches.get((column, month))
+                if sketch is None:
+                    sketch = self.sketches[(column, month)] = HyperLogLog(self.precision)
+                sketch.add_hashes(hash_values(row[position] for row in rows))
+
+    def _months(self, months):
+        return queries.selected_months(self.months, months)
+
+    def distinct_count(self, column, months=None):
+        with self.lock:
+            merged = HyperLogLog(self.precision)
+            for month in self._months(months):
+                sketch = self.sketches.get((column, month))
+                if sketch is not None:
+                    merged.merge(sketch)
+        return merged.count()
+
+    def distinct_counts(self, columns, months=None):
+        counts = [self.distinct_count(column, months) for column in columns]
+        return pd.DataFrame({"Column": columns, "Unique Values": counts})
+
+
+def get_sketches(db_path, error=DEFAULT_ERROR):
+    """Return the process-wide sketch store for ``db_path`` at ``error``."""
+    return shared(SketchStore, db_path, precision_for(error))
@@ -0,0 +1,212 @@
+"""Incremental ingestion of new suspect rows into rolling aggregates.
+
+The registry only grows during the day, so instead of recomputing every
+metric over ``new_suspect_file2`` we remember the last ``rowid`` seen and
+fold just the new rows into maintained state: per-month record counts,
+per-month bank/source counts and per-month distinct sets for every column.
+A refresh therefore costs time proportional to the delta, not the table.
+
+Rows whose ``Date`` does not parse are kept under the ``None`` month so the
+header metrics (computed over the whole table) stay exact.
+
+:class:`WatermarkFollower` is the rowid-following part on its own; the
+identifier index, record linkage and distinct-count sketches build on it
+too. A refresh first compares the database's fingerprint (file mtime/size
+and ``PRAGMA data_version``) with the last one and returns at once if
+nothing was committed. Otherwise it checks that the rows already folded are
+still there before folding new ones: the delete/update counter of
+``rollups.install_change_log`` must not have moved, and the row at the
+watermark must be the same (SQLite hands out a deleted tail's rowids
+again). A delete, an update, a rebuild or a reused rowid resets the state
+and reloads it. Without the change log the check falls back to counting
+the rows at or below the watermark, which scans the table and misses
+in-place updates; those then need an explicit
+:meth:`WatermarkFollower.reset`.
+"""
+import threading
+import time
+from collections import Counter, defaultdict
+
+import pandas as pd
+
+import queries
+import rollups
+from cache import DatabaseWatch
+
+COUNTED_COLUMNS = ["bank_name", "source"]
+CHUNK_SIZE = 50_000
+
+
+class WatermarkFollower:
+    """In-memory state kept up to date with ``new_suspect_file2`` by rowid.
+
+    Subclasses clear their state in :meth:`clear`, pick the SQL expressions
+    they read for each new row in :meth:`select` and fold each chunk of
+    ``(rowid, *selected)`` rows in :meth:`fold`.
+    """
+
+    def __init__(self, db_path, chunk_size=CHUNK_SIZE):
+        self.db_path = db_path
+        self.chunk_size = chunk_size
+        self.lock = threading.RLock()
+        self.watch = DatabaseWatch(db_path)
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.watermark = 0
+            self.folded = 0
+            self.last_row = None
+            self.changes = None
+            self.fingerprint = None
+            self.last_refresh = {"rows": 0, "seconds": 0.0}
+            self.clear()
+
+    def clear(self):
+        raise NotImplementedError
+
+    def select(self, columns):
+        """SQL expressions to read from each new row, given the table's columns."""
+        raise NotImplementedError
+
+    def fold(self, chunk):
+        raise NotImplementedError
+
+    def folded_chunks(self):
+        """Called once a refresh has folded every new chunk."""
+
+    def unchanged(self, conn, changes):
+        """Whether every row folded so far is still in the table, under the same rowid."""
+        if not self.watermark:
+            return True
+        if changes is not None and self.changes is not None:
+            kept = changes == self.changes
+        else:
+            kept = queries.record_count(conn, ("rowid <= ?", [self.watermark])) == self.folded
+        return kept and queries.row_at(conn, self.watermark) == self.last_row
+
+    def refresh(self):
+        """Fold rows added since the last refresh into the state; return how many."""
+        with self.lock:
+            started = time.perf_counter()
+            fingerprint = self.watch.fingerprint()
+            if fingerprint == self.fingerprint:
+                self.last_refresh = {"rows": 0, "seconds": time.perf_counter() - started}
+                return 0
+            conn = queries.connect(self.db_path)
+            try:
+                changes = rollups.change_count(conn)
+                if not self.unchanged(conn, changes):
+                    self.reset()
+                select = self.select(queries.table_columns(conn))
+                added = 0
+                if select:
+                    for chunk in queries.iter_new_rows(conn, select, self.watermark, self.chunk_size):
+                        self.fold(chunk)
+                        self.watermark = chunk[-1][0]
+                        added += len(chunk)
+                    self.folded_chunks()
+                if added:
+                    self.folded += added
+                    self.last_row = queries.row_at(conn, self.watermark)
+                self.changes = changes
+                self.fingerprint = fingerprint
+            finally:
+                conn.close()
+            self.last_refresh = {"rows": added, "seconds": time.perf_counter() - started}
+            return added
+
+
+class IncrementalAggregates(WatermarkFollower):
+    def clear(self):
+        self.columns = []
+        self.month_counts = Counter()
+        self.counts = {column: defaultdict(Counter) for column in COUNTED_COLUMNS}
+        self.distinct = defaultdict(lambda: defaultdict(set))
+
+    def select(self, columns):
+        self.columns = columns
+        month = (f"strftime('%Y-%m', {queries.quote(queries.DATE_COLUMN)})"
+                 if queries.DATE_COLUMN in columns else "NULL")
+        return [month] + [queries.quote(column) for column in columns]
+
+    def fold(self, chunk):
+        positions = {column: index + 2 for index, column in enumerate(self.columns)}
+        counted = [(column, positions[column]) for column in COUNTED_COLUMNS if column in positions]
+        tracked = [(column, positions[column]) for column in self.columns
+                   if column not in queries.EXCLUDED_COLUMNS]
+        for row in chunk:
+            month = row[1]
+            self.month_counts[month] += 1
+            for column, position in counted:
+                if row[position] is not None:
+                    self.counts[column][month][row[position]] += 1
+            for column, position in tracked:
+                if row[position] is not None:
+                    self.distinct[column][month].add(row[position])
+
+    # ---- answers, mirroring the ``queries`` functions --------------------
+    def answers(self, func, *args):
+        """Whether this state can answer ``func(*args)`` from ``queries``."""
+        if func.__name__ == "value_counts":
+            return args[0] in self.counts
+        return func.__name__ in {"record_count", "distinct_count", "distinct_values",
+                                 "list_months", "distinct_counts"}
+
+    def _months(self, months):
+        return queries.selected_months(self.month_counts.keys(), months)
+
+    def _union(self, column, months):
+        buckets = self.distinct.get(column, {})
+        selected = [buckets[month] for month in self._months(months) if month in buckets]
+        return set().union(*selected)
+
+    def record_count(self, months=None):
+        with self.lock:
+            return sum(self.month_counts[month] for month in self._months(months))
+
+    def distinct_count(self, column, months=None):
+        with self.lock:
+            return len(self._union(column, months))
+
+    def distinct_values(self, column):
+        with self.lock:
+            return list(self._union(column, None))
+
+    def list_months(self):
+        with self.lock:
+            return sorted(month for month in self.month_counts if month is not None)
+
+    def distinct_counts(self, columns, months=None):
+        with self.lock:
+            counts = [len(self._union(column, months)) for column in columns]
+        return pd.DataFrame({"Column": columns, "Unique Values": counts})
+
+    def value_counts(self, column, months=None, limit=None):
+        with self.lock:
+            total = Counter()
+            for month in self._months(months):
+                total.update(self.counts[column].get(month, {}))
+        ranked = sorted(total.items(), key=lambda item: (-item[1], str(item[0])))
+        if limit is not None:
+            ranked = ranked[:int(limit)]
+        return pd.DataFrame(ranked, columns=["value", "count"])
+
+
+_states = {}
+_states_lock = threading.Lock()
+
+
+def shared(cls, db_path, *args):
+    """Return the process-wide ``cls(db_path, *args)``, creating it on first use."""
+    key = (cls, db_path, *args)
+    with _states_lock:
+        state = _states.get(key)
+        if state is None:
+            state = _states[key] = cls(db_path, *args)
+        return state
+
+
+def get_aggregates(db_path):
+    """Return the process-wide incremental state for ``db_path``."""
+    return shared(IncrementalAggregates, db_path)
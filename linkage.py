@@ -0,0 +1,148 @@
+"""Cross-identifier linkage of suspect records.
+
+Records that share any phone number, email, account number or CIN are
+probably the same actor. Instead of comparing records pairwise, every
+normalized identifier value keeps the list of records it was seen on, and
+records sharing a value are merged into one set with union-find (path
+halving, union by size). That makes linking near-linear in the number of
+identifier values and lets new rows be folded in as they arrive; the
+linkage is an :class:`incremental.WatermarkFollower`. Each root keeps its
+member list (smaller lists merge into larger ones), so opening a cluster
+never walks the whole table.
+
+A value that ties together more than ``MAX_LINKED_VALUES`` distinct other
+identifiers (a helpline number, a bank's pooled account, a shell company
+fronting several rings) is a hub rather than evidence that its records
+belong to one actor: chaining through hubs collapses most of the table into
+a single cluster. How many records carry a value does not matter, so a
+repeat offender reported thousands of times with their own phone, email
+and account still forms one cluster. Hubs are not used for linking; their
+records are kept so :meth:`RecordLinkage.hubs` can list and open them like
+clusters. When a value first crosses the limit, the clusters are rebuilt
+without it.
+"""
+import heapq
+
+import queries
+from incremental import WatermarkFollower, shared
+from lookup import NORMALIZERS
+
+LINK_COLUMNS = ["phone_number_of_suspect", "email_address_of_suspect", "account_number", "cin_number"]
+MAX_LINKED_VALUES = 50
+# Filler values that would otherwise link unrelated records together
+PLACEHOLDERS = {"NA", "N/A", "NIL", "NONE", "NULL", "NOTAVAILABLE", "na", "n/a", "nil", "none", "null"}
+
+
+def is_placeholder(key):
+    return key in PLACEHOLDERS or len(set(key)) == 1
+
+
+class RecordLinkage(WatermarkFollower):
+    def __init__(self, db_path, max_links=MAX_LINKED_VALUES, **kwargs):
+        self.max_links = max_links
+        super().__init__(db_path, **kwargs)
+
+    def clear(self):
+        self.linked = []
+        self.parent = {}
+        self.members = {}
+        self.records = {}  # (column, normalized value) -> rowids carrying it
+        self.links = {}  # (column, normalized value) -> other identifiers seen on its records
+        self.hub_records = {}  # values over the limit -> rowids carrying them
+        self.bank = {}
+        self.stale = False
+
+    # ---- union-find -------------------------------------------------------
+    def find(self, rowid):
+        parent = self.parent
+        while parent[rowid] != rowid:
+            parent[rowid] = parent[parent[rowid]]
+            rowid = parent[rowid]
+        return rowid
+
+    def union(self, first, second):
+        first, second = self.find(first), self.find(second)
+        if first == second:
+            return first
+        if len(self.members[first]) < len(self.members[second]):
+            first, second = second, first
+        self.parent[second] = first
+        self.members[first].extend(self.members.pop(second))
+        return first
+
+    # ---- ingestion --------------------------------------------------------
+    def select(self, columns):
+        present = set(columns)
+        self.linked = [column for column in LINK_COLUMNS if column in present]
+        bank = queries.quote("bank_name") if "bank_name" in present else "NULL"
+        return [bank] + [queries.quote(column) for column in self.linked]
+
+    def fold(self, chunk):
+        normalizers = [NORMALIZERS[column] for column in self.linked]
+        for row in chunk:
+            rowid = row[0]
+            self.parent[rowid] = rowid
+            self.members[rowid] = [rowid]
+            self.bank[rowid] = row[1]
+            identifiers = []
+            for column, normalize, value in zip(self.linked, normalizers, row[2:]):
+                if value is None:
+                    continue
+                key = normalize(value)
+                if key and not is_placeholder(key):
+                    identifiers.append((column, key))
+            for identifier in identifiers:
+                self._add(identifier, rowid, identifiers)
+
+    def _add(self, identifier, rowid, identifiers):
+        if identifier in self.hub_records:
+            self.hub_records[identifier].append(rowid)
+            return
+        rowids = self.records.get(identifier)
+        if rowids is None:
+            self.records[identifier] = [rowid]
+            self.links[identifier] = set(identifiers)
+            return
+        rowids.append(rowid)
+        links = self.links[identifier]
+        links.update(identifiers)  # includes the value itself, hence the + 1 below
+        if len(links) > self.max_links + 1:
+            # Unions already made through this value have to be undone
+            self.hub_records[identifier] = self.records.pop(identifier)
+            del self.links[identifier]
+            self.stale = True
+        else:
+            self.union(rowids[0], rowid)
+
+    def folded_chunks(self):
+        if self.stale:
+            self.parent = {rowid: rowid for rowid in self.bank}
+            self.members = {rowid: [rowid] for rowid in self.bank}
+            for rowids in self.records.values():
+                for rowid in rowids[1:]:
+                    self.union(rowids[0], rowid)
+            self.stale = False
+
+    # ---- clusters ---------------------------------------------------------
+    def _summary(self, rowids):
+        banks = sorted({self.bank[rowid] for rowid in rowids if self.bank[rowid] is not None}, key=str)
+        return {"records": len(rowids), "banks": banks, "rowids": sorted(rowids)}
+
+    def top_clusters(self, limit=10, min_size=2):
+        """The largest clusters, biggest first, with the banks they span."""
+        with self.lock:
+            largest = heapq.nlargest(limit, self.members.items(), key=lambda item: len(item[1]))
+            return [{"cluster": root, **self._summary(rowids)}
+                    for root, rowids in largest if len(rowids) >= min_size]
+
+    def hubs(self, limit=10):
+        """The most widely shared identifier values left out of linking, with their records."""
+        with self.lock:
+            largest = heapq.nlargest(limit, self.hub_records.items(), key=lambda item: len(item[1]))
+            return [{"column": column, "value": key, **self._summary(rowids)}
+                    for (column, key), rowids in largest]
+
+
+def get_linkage(db_path, max_links=MAX_LINKED_VALUES):
+    """Return the process-wide record linkage for ``db_path`` and hub limit."""
+    return shared(RecordLinkage, db_path, max_links)
@@ -0,0 +1,155 @@
+"""Indexed lookup of suspect identifiers.
+
+Investigators type a phone number, email, account number, IFSC, CIN or
+account holder name and get the matching records from every identifier
+column (or just one). Each identifier column
+gets an in-memory hash index (normalized value -> rowids) for exact matches
+and a sorted key list for prefix matches, so a lookup costs a dict probe or
+a binary search no matter how large the table is. Values are normalized
+before indexing and before searching: phone numbers lose punctuation and a
+leading "+91"/"0", emails are case-folded, codes are upper-cased.
+
+The index is an :class:`incremental.WatermarkFollower`: a refresh only
+indexes rows added since the last one. A short prefix can match most of the
+table, so prefix matching starts at ``MIN_PREFIX`` characters (shorter
+text only matches whole identifiers) and searches list at most ``limit``
+rowids per column; ask for one more than you show to learn whether the
+list was cut short. Either way a lookup never walks more than ``limit``
+keys.
+"""
+import bisect
+import re
+from collections import defaultdict
+
+import queries
+from incremental import WatermarkFollower, shared
+
+MAX_RESULTS = 10_000
+MIN_PREFIX = 4
+LAST_CHARACTER = "\U0010ffff"  # sorts after anything that can follow a prefix
+
+NON_DIGITS = re.compile(r"\D")
+SPACES = re.compile(r"\s+")
+SEPARATORS = re.compile(r"[\s\-./]")
+
+
+def _text(value):
+    # Numbers read back from SQLite as floats would otherwise gain a ".0"
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value)
+
+
+def normalize_phone(value):
+    text = _text(value).strip()
+    if text.startswith("+91"):
+        text = text[3:]
+    digits = NON_DIGITS.sub("", text)
+    if len(digits) == 12 and digits.startswith("91"):
+        digits = digits[2:]
+    elif len(digits) == 11 and digits.startswith("0"):
+        digits = digits[1:]
+    return digits
+
+
+def normalize_email(value):
+    return str(value).strip().casefold()
+
+
+def normalize_code(value):
+    # IFSC, CIN and account numbers: drop separators, compare case-insensitively
+    return SEPARATORS.sub("", _text(value)).upper()
+
+
+def normalize_name(value):
+    return SPACES.sub(" ", str(value)).strip().casefold()
+
+
+NORMALIZERS = {
+    "account_holder_name": normalize_name,
+    "email_address_of_suspect": normalize_email,
+    "phone_number_of_suspect": normalize_phone,
+    "ifsc_code": normalize_code,
+    "account_number": normalize_code,
+    "cin_number": normalize_code,
+}
+
+
+class IdentifierIndex(WatermarkFollower):
+    def clear(self):
+        self.columns = []
+        self.postings = {column: defaultdict(list) for column in NORMALIZERS}
+        self.keys = {column: [] for column in NORMALIZERS}
+        self.new_keys = {column: set() for column in NORMALIZERS}
+
+    def select(self, columns):
+        present = set(columns)
+        self.columns = [column for column in NORMALIZERS if column in present]
+        return [queries.quote(column) for column in self.columns]
+
+    def fold(self, chunk):
+        for position, column in enumerate(self.columns, start=1):
+            normalize = NORMALIZERS[column]
+            postings = self.postings[column]
+            new_keys = self.new_keys[column]
+            for row in chunk:
+                value = row[position]
+                if value is None:
+                    continue
+                key = normalize(value)
+                if not key:
+                    continue
+                if key not in postings:
+                    new_keys.add(key)
+                postings[key].append(row[0])
+
+    def folded_chunks(self):
+        self._merge_keys(self.new_keys)
+        self.new_keys = {column: set() for column in NORMALIZERS}
+
+    def _merge_keys(self, new_keys):
+        for column, fresh in new_keys.items():
+            keys = self.keys[column]
+            if len(fresh) < 1000:
+                for key in fresh:
+                    bisect.insort(keys, key)
+            else:
+                self.keys[column] = sorted(set(keys) | fresh)
+
+    def _matching_keys(self, column, key, prefix, limit):
+        # The exact key first, then up to ``limit`` longer keys it is a prefix of
+        if key in self.postings[column]:
+            yield key
+        if prefix and len(key) >= MIN_PREFIX:
+            keys = self.keys[column]
+            start = bisect.bisect_right(keys, key)
+            stop = len(keys) if limit is None else min(len(keys), start + limit)
+            yield from keys[start:bisect.bisect_left(keys, key + LAST_CHARACTER, start, stop)]
+
+    def search(self, column, text, prefix=True, limit=MAX_RESULTS):
+        """Rowids whose ``column`` matches ``text``, exact matches first (at most ``limit``)."""
+        key = NORMALIZERS[column](text)
+        if not key:
+            return []
+        rowids = []
+        with self.lock:
+            postings = self.postings[column]
+            for candidate in self._matching_keys(column, key, prefix, limit):
+                rowids.extend(postings[candidate])
+                if limit is not None and len(rowids) >= limit:
+                    break
+        return rowids[:limit]
+
+    def search_all(self, text, prefix=True, limit=MAX_RESULTS, columns=None):
+        """Matching rowids per identifier column, skipping columns with no match."""
+        matches = {}
+        for column in self.columns if columns is None else [c for c in columns if c in self.columns]:
+            rowids = self.search(column, text, prefix, limit)
+            if rowids:
+                matches[column] = rowids
+        return matches
+
+
+def get_index(db_path):
+    """Return the process-wide identifier index for ``db_path``."""
+    return shared(IdentifierIndex, db_path)
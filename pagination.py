@@ -0,0 +1,190 @@
+"""Server-side pages and streaming exports of matching suspect records.
+
+The drill-down table asks SQLite for one page at a time using keyset
+pagination: each page continues from the sort key and rowid of the last row
+shown, so page 500 costs the same as page 1 (no growing ``OFFSET`` scan).
+Sorting and column projection happen in SQL, and only the projected
+columns of ``page_size`` rows ever reach the browser.
+
+Exports walk the same query with ``fetchmany`` and write each chunk
+straight to disk, so memory use stays at one chunk however many records
+match while the file is written. Streamlit serves downloads from memory,
+though, so :func:`export_bytes` reads the finished file back once to hand
+it over and deletes it straight away.
+"""
+import csv
+import os
+import tempfile
+import time
+
+import pandas as pd
+
+import queries
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - optional dependency
+    pa = pq = None
+
+PAGE_SIZES = [25, 50, 100, 250]
+EXPORT_CHUNK_SIZE = 10_000
+EXPORT_DIR = os.path.join(tempfile.gettempdir(), "suspect_registry_exports")
+EXPORT_MAX_AGE = 60 * 60  # seconds before a leftover export file is removed
+ROWID = "_rowid"
+SORT_KEY = "_sort_key"
+
+
+def _keyset(sort_column, descending, cursor):
+    """Predicate for rows after ``cursor`` (the last row's sort key and rowid).
+
+    NULL sort keys come last in both directions, then ties break on rowid.
+    """
+    if cursor is None:
+        return None
+    last_key, last_rowid = cursor
+    after = "<" if descending else ">"
+    if sort_column is None:
+        return f"rowid {after} ?", [last_rowid]
+    col = queries.quote(sort_column)
+    if last_key is None:
+        return f"{col} IS NULL AND rowid {after} ?", [last_rowid]
+    return (f"{col} {after} ? OR ({col} = ? AND rowid {after} ?) OR {col} IS NULL",
+            [last_key, last_key, last_rowid])
+
+
+def _order(sort_column, descending):
+    direction = "DESC" if descending else "ASC"
+    if sort_column is None:
+        return f"rowid {direction}"
+    col = queries.quote(sort_column)
+    return f"{col} IS NULL, {col} {direction}, rowid {direction}"
+
+
+def page_sql(predicate, columns, sort_column=None, descending=False, cursor=None, page_size=50):
+    select = ", ".join(queries.quote(column) for column in columns) or "NULL AS _empty"
+    sort_key = queries.quote(sort_column) if sort_column else "rowid"
+    clause, params = queries.combine(predicate, _keyset(sort_column, descending, cursor))
+    sql = (f"SELECT rowid AS {ROWID}, {sort_key} AS {SORT_KEY}, {select} "
+           f"FROM {queries.quote(queries.TABLE)} {clause} "
+           f"ORDER BY {_order(sort_column, descending)} LIMIT ?")
+    return sql, params + [int(page_size) + 1]
+
+
+def fetch_page(conn, predicate, columns, sort_column=None, descending=False, cursor=None, page_size=50):
+    """One page of matching rows, plus one extra row to tell whether more follow.
+
+    The result keeps ``_rowid`` and ``_sort_key`` columns; pass it to
+    :func:`next_cursor` to get the following page. Values are kept exactly as
+    SQLite returned them (object columns), so a NULL never turns a column of
+    17-digit account numbers into rounded floats.
+    """
+    sql, params = page_sql(predicate, columns, sort_column, descending, cursor, page_size)
+    cursor = conn.execute(sql, params)
+    names = [description[0] for description in cursor.description]
+    return pd.DataFrame(cursor.fetchall(), columns=names, dtype=object)
+
+
+def next_cursor(page, page_size):
+    """Cursor for the page after ``page``, or ``None`` when it was the last one."""
+    if len(page) <= page_size:
+        return None
+    last = page.iloc[page_size - 1]
+    return last[SORT_KEY], int(last[ROWID])
+
+
+def visible(page, page_size):
+    """The rows and columns of ``page`` meant for display."""
+    return page.head(page_size).drop(columns=[ROWID, SORT_KEY]).reset_index(drop=True)
+
+
+def _export_cursor(conn, predicate, columns, sort_column, descending):
+    if not columns:
+        raise ValueError("Choose at least one column to export")
+    select = ", ".join(queries.quote(column) for column in columns)
+    clause, params = queries.combine(predicate)
+    sql = (f"SELECT {select} FROM {queries.quote(queries.TABLE)} {clause} "
+           f"ORDER BY {_order(sort_column, descending)}")
+    return conn.execute(sql, params)
+
+
+def remove_stale_exports(max_age=EXPORT_MAX_AGE):
+    """Delete export files older than ``max_age`` seconds (left by crashed runs)."""
+    if not os.path.isdir(EXPORT_DIR):
+        return
+    cutoff = time.time() - max_age
+    for entry in os.scandir(EXPORT_DIR):
+        try:
+            if entry.is_file() and entry.stat().st_mtime < cutoff:
+                os.remove(entry.path)
+        except OSError:
+            pass  # removed by another session meanwhile
+
+
+def export_path(extension):
+    os.makedirs(EXPORT_DIR, exist_ok=True)
+    handle, path = tempfile.mkstemp(prefix="suspects_", suffix=f".{extension}", dir=EXPORT_DIR)
+    os.close(handle)
+    return path
+
+
+def export_csv(conn, predicate, columns, path, sort_column=None, descending=False,
+               chunk_size=EXPORT_CHUNK_SIZE):
+    """Stream matching rows to a CSV file chunk by chunk; return the row count."""
+    cursor = _export_cursor(conn, predicate, columns, sort_column, descending)
+    written = 0
+    with open(path, "w", newline="", encoding="utf-8") as handle:
+        writer = csv.writer(handle)
+        writer.writerow(columns)
+        while True:
+            chunk = cursor.fetchmany(chunk_size)
+            if not chunk:
+                break
+            writer.writerows(chunk)
+            written += len(chunk)
+    return written
+
+
+def export_parquet(conn, predicate, columns, path, sort_column=None, descending=False,
+                   chunk_size=EXPORT_CHUNK_SIZE):
+    """Stream matching rows to a Parquet file one row group per chunk.
+
+    SQLite columns may hold mixed types, so every value is written as text
+    (like the CSV export) to keep one schema across chunks.
+    """
+    if pq is None:
+        raise RuntimeError("Parquet export needs pyarrow")
+    schema = pa.schema([(column, pa.string()) for column in columns])
+    cursor = _export_cursor(conn, predicate, columns, sort_column, descending)
+    written = 0
+    with pq.ParquetWriter(path, schema) as writer:
+        while True:
+            chunk = cursor.fetchmany(chunk_size)
+            if not chunk:
+                break
+            arrays = [pa.array([None if value is None else str(value) for value in values], pa.string())
+                      for values in zip(*chunk)]
+            writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+            written += len(chunk)
+    return written
+
+
+EXPORTERS = {"csv": export_csv, "parquet": export_parquet}
+
+
+def export_bytes(db_path, predicate, columns, export_format, sort_column=None, descending=False):
+    """Stream matching rows to a temporary export file and return its contents.
+
+    The file is deleted before returning. The returned bytes still hold the
+    whole export, since that is what Streamlit's download button serves.
+    """
+    remove_stale_exports()
+    path = export_path(export_format)
+    conn = queries.connect(db_path)
+    try:
+        EXPORTERS[export_format](conn, predicate, columns, path, sort_column, descending)
+        with open(path, "rb") as handle:
+            return handle.read()
+    finally:
+        conn.close()
+        os.remove(path)
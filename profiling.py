@@ -0,0 +1,172 @@
+"""Per-rerun render profiling for the dashboard.
+
+Every Streamlit rerun builds one :class:`RenderProfile`. Each stage of the
+page (connect, queries, aggregations, chart builds and renders) runs inside
+a :meth:`RenderProfile.span`, which records wall time, the rows and bytes
+the stage produced and, when detailed tracing is on, the peak Python memory
+allocated during the stage. At the end of the rerun the profile is logged
+as one JSON line, and stages or reruns slower than the thresholds are
+flagged so regressions stand out.
+
+:func:`configure_logging` sends those lines to stderr. Slow reruns are
+logged by default; set ``SUSPECT_REGISTRY_PROFILE_LOG=INFO`` to log every
+rerun, or configure the ``suspect_registry.profile`` logger yourself.
+
+tracemalloc is process-wide: while any session has detailed tracing on,
+every session's allocations are traced, a stage's peak includes whatever
+other sessions allocated at the same time, and a stage starting in another
+session resets the peak (``tracemalloc.reset_peak`` is global too). Tracing stops as soon
+as no rerun needs it, so closing the panel removes the overhead.
+"""
+import json
+import logging
+import os
+import threading
+import time
+import tracemalloc
+import weakref
+from contextlib import contextmanager
+
+import pandas as pd
+
+SLOW_RERUN_SECONDS = 2.0
+SLOW_STAGE_SECONDS = 0.5
+
+LOG_LEVEL_VARIABLE = "SUSPECT_REGISTRY_PROFILE_LOG"
+
+logger = logging.getLogger("suspect_registry.profile")
+
+
+def configure_logging(level=None):
+    """Log profiles to stderr at ``level`` (default from the environment, else WARNING)."""
+    if not logger.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+        logger.addHandler(handler)
+        logger.propagate = False
+    logger.setLevel(level or os.environ.get(LOG_LEVEL_VARIABLE, "WARNING").upper())
+
+
+def resident_memory():
+    """Current resident set size of this process in bytes (0 if unknown)."""
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        pass
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+        # Peak rather than current, but better than nothing (kilobytes on Linux)
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    except ImportError:
+        return 0
+
+
+_tracing_lock = threading.Lock()
+_tracing_reruns = 0
+
+
+def _start_tracing():
+    global _tracing_reruns
+    with _tracing_lock:
+        _tracing_reruns += 1
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+
+def _stop_tracing():
+    global _tracing_reruns
+    with _tracing_lock:
+        _tracing_reruns -= 1
+        if _tracing_reruns == 0 and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+
+def measure(value):
+    """``(rows, bytes)`` for a stage's result, or ``None`` where it doesn't apply."""
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        usage = value.memory_usage(deep=True)
+        return len(value), int(usage.sum() if isinstance(usage, pd.Series) else usage)
+    if hasattr(value, "to_json") and hasattr(value, "data"):
+        # Plotly figure: the bytes shipped to the browser, if the chart already measured them
+        # (serialising a figure again here would cost as much as building it)
+        rows = sum(len(trace.x) if trace.x is not None else 0 for trace in value.data)
+        return rows, getattr(value, "_payload_bytes", None)
+    if isinstance(value, (list, tuple, set)):
+        return len(value), None
+    return None, None
+
+
+class RenderProfile:
+    def __init__(self, trace_memory=False, slow_rerun=SLOW_RERUN_SECONDS, slow_stage=SLOW_STAGE_SECONDS):
+        self.trace_memory = trace_memory
+        self.slow_rerun = slow_rerun
+        self.slow_stage = slow_stage
+        self.stages = []
+        self.started = time.perf_counter()
+        self.rss_start = resident_memory()
+        self._release = None
+        if trace_memory:
+            _start_tracing()
+            # Also released if the profile is dropped unclosed, e.g. when Streamlit
+            # interrupts a rerun with a BaseException that skips finish()
+            self._release = weakref.finalize(self, _stop_tracing)
+
+    @contextmanager
+    def span(self, name):
+        """Time a stage; set ``stage["result"]`` to have its rows and bytes measured."""
+        stage = {"stage": name}
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+        started = time.perf_counter()
+        try:
+            yield stage
+        finally:
+            stage["seconds"] = time.perf_counter() - started
+            rows, size = measure(stage.pop("result", None))
+            stage["rows"], stage["bytes"] = rows, size
+            if self.trace_memory:
+                stage["peak_bytes"] = tracemalloc.get_traced_memory()[1] - base
+            stage["slow"] = stage["seconds"] > self.slow_stage
+            self.stages.append(stage)
+
+    def run(self, name, func, *args, **kwargs):
+        """Call ``func`` inside a span and return its result."""
+        with self.span(name) as stage:
+            stage["result"] = func(*args, **kwargs)
+            return stage["result"]
+
+    def finish(self):
+        """Close the profile, log it as one JSON line and return the summary."""
+        total = time.perf_counter() - self.started
+        summary = {
+            "seconds": round(total, 4),
+            "slow": total > self.slow_rerun,
+            "rss_start": self.rss_start,
+            "rss_end": resident_memory(),
+            "stages": [{**stage, "seconds": round(stage["seconds"], 4)} for stage in self.stages],
+        }
+        if self.trace_memory:
+            summary["traced_peak_bytes"] = max((stage.get("peak_bytes", 0) for stage in self.stages), default=0)
+        self.close()
+        line = json.dumps(summary, default=str)
+        if summary["slow"]:
+            logger.warning("slow rerun: %s", line)
+        else:
+            logger.info(line)
+        return summary
+
+    def close(self):
+        """Release this profile's hold on tracemalloc (idempotent; :meth:`finish` calls it)."""
+        if self._release is not None:
+            self._release()  # runs _stop_tracing at most once
+
+    def frame(self):
+        """The stages as a table for the debug panel."""
+        return pd.DataFrame(self.stages, columns=["stage", "seconds", "rows", "bytes", "peak_bytes", "slow"])
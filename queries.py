@@ -0,0 +1,191 @@
+"""SQL query layer for the Suspect Registry Dashboard.
+
+Every metric, card and chart on the dashboard is computed inside SQLite so
+only the aggregated result crosses into pandas. Full rows are only fetched
+for the final drill-down table.
+
+Dates are expected in the ISO text form pandas writes with ``to_sql``
+(``YYYY-MM-DD`` or ``YYYY-MM-DD HH:MM:SS``), which lets the Month/Year
+filter become a plain range predicate on ``Date``. SQLite cannot read other
+layouts (``DD-MM-YYYY`` and so on) the way ``pd.to_datetime`` could, so such
+rows fall out of month-filtered views; :func:`unparsed_dates` counts them
+so the dashboard can warn.
+"""
+import json
+import sqlite3
+
+import pandas as pd
+
+TABLE = "new_suspect_file2"
+DATE_COLUMN = "Date"
+EXCLUDED_COLUMNS = ["Date", "Month_Year"]
+IDENTIFIER_COLUMNS = ["account_holder_name", "email_address_of_suspect", "phone_number_of_suspect",
+                      "ifsc_code", "account_number", "cin_number"]
+
+
+def quote(name):
+    """Quote an identifier for safe use in SQL."""
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def connect(db_path):
+    return sqlite3.connect(db_path)
+
+
+def table_columns(conn, table=TABLE):
+    return [row[1] for row in conn.execute(f"PRAGMA table_info({quote(table)})")]
+
+
+def next_month(month):
+    year, mon = (int(part) for part in month.split("-"))
+    year, mon = (year + 1, 1) if mon == 12 else (year, mon + 1)
+    return f"{year:04d}-{mon:02d}"
+
+
+def month_filter(months):
+    """Turn the sidebar Month/Year selection into a ``(sql, params)`` predicate.
+
+    Rows whose ``Date`` does not parse are always excluded, matching the
+    ``dropna(subset=["Date"])`` the dashboard used to do in pandas.
+    """
+    date = quote(DATE_COLUMN)
+    valid = f"date({date}) IS NOT NULL"
+    if "All" in months:
+        return valid, []
+    if not months:
+        return "0", []
+
+    ranges, params = [], []
+    for month in sorted(months):
+        ranges.append(f"({date} >= ? AND {date} < ?)")
+        params += [f"{month}-01", f"{next_month(month)}-01"]
+    return f"{valid} AND ({' OR '.join(ranges)})", params
+
+
+def selected_months(known, months):
+    """The months among ``known`` that a sidebar selection covers.
+
+    ``None`` means every row, including undated ones kept under a ``None``
+    month; "All" means every row with a valid Date.
+    """
+    if months is None:
+        return list(known)
+    if "All" in months:
+        return [month for month in known if month is not None]
+    return [month for month in months if month in known]
+
+
+def conjoin(*predicates):
+    """AND together ``(sql, params)`` predicates into a single predicate."""
+    parts, params = [], []
+    for predicate in predicates:
+        if predicate is None:
+            continue
+        sql, args = predicate
+        if sql:
+            parts.append(f"({sql})")
+            params += list(args)
+    return " AND ".join(parts), params
+
+
+def combine(*predicates):
+    """AND together ``(sql, params)`` predicates into a WHERE clause."""
+    sql, params = conjoin(*predicates)
+    return (f"WHERE {sql}" if sql else ""), params
+
+
+def rowid_filter(rowids):
+    """Predicate matching a list of rowids of any length (one JSON parameter)."""
+    return "rowid IN (SELECT value FROM json_each(?))", [json.dumps([int(rowid) for rowid in rowids])]
+
+
+def column_filter(column, value):
+    return f"{quote(column)} = ?", [value]
+
+
+def list_months_sql():
+    date = quote(DATE_COLUMN)
+    return (f"SELECT DISTINCT strftime('%Y-%m', {date}) AS month FROM {quote(TABLE)} "
+            f"WHERE month IS NOT NULL ORDER BY month"), []
+
+
+def list_months(conn):
+    return [row[0] for row in conn.execute(*list_months_sql())]
+
+
+def unparsed_dates(conn, examples=3):
+    """``(count, sample values)`` of non-empty Dates SQLite cannot parse."""
+    date, table = quote(DATE_COLUMN), quote(TABLE)
+    count = conn.execute(f"SELECT COUNT({date}) - COUNT(date({date})) FROM {table}").fetchone()[0]
+    sample = conn.execute(f"SELECT DISTINCT {date} FROM {table} "
+                          f"WHERE {date} IS NOT NULL AND date({date}) IS NULL LIMIT ?", [examples])
+    return count, [row[0] for row in sample]
+
+
+def record_count_sql(where=None):
+    clause, params = combine(where)
+    return f"SELECT COUNT(*) FROM {quote(TABLE)} {clause}", params
+
+
+def record_count(conn, where=None):
+    return conn.execute(*record_count_sql(where)).fetchone()[0]
+
+
+def distinct_count(conn, column, where=None):
+    clause, params = combine(where)
+    sql = f"SELECT COUNT(DISTINCT {quote(column)}) FROM {quote(TABLE)} {clause}"
+    return conn.execute(sql, params).fetchone()[0]
+
+
+def distinct_counts_sql(columns, where=None):
+    clause, params = combine(where)
+    select = ", ".join(f"COUNT(DISTINCT {quote(column)})" for column in columns)
+    return f"SELECT {select} FROM {quote(TABLE)} {clause}", params
+
+
+def distinct_counts(conn, columns, where=None):
+    """``COUNT(DISTINCT ...)`` for every column in a single table scan."""
+    if not columns:
+        return pd.DataFrame({"Column": [], "Unique Values": []})
+    counts = conn.execute(*distinct_counts_sql(columns, where)).fetchone()
+    return pd.DataFrame({"Column": columns, "Unique Values": list(counts)})
+
+
+def distinct_values(conn, column):
+    sql = f"SELECT DISTINCT {quote(column)} FROM {quote(TABLE)}"
+    return [row[0] for row in conn.execute(sql)]
+
+
+def value_counts_sql(column, where=None, limit=None):
+    col = quote(column)
+    clause, params = combine(where, (f"{col} IS NOT NULL", []))
+    sql = (f"SELECT {col} AS value, COUNT(*) AS count FROM {quote(TABLE)} {clause} "
+           f"GROUP BY {col} ORDER BY count DESC, {col}")
+    if limit is not None:
+        sql += " LIMIT ?"
+        params.append(int(limit))
+    return sql, params
+
+
+def value_counts(conn, column, where=None, limit=None):
+    """Per-value row counts, most frequent first (NULLs dropped like pandas)."""
+    sql, params = value_counts_sql(column, where, limit)
+    return pd.read_sql_query(sql, conn, params=params)
+
+
+def iter_new_rows(conn, select, watermark, chunk_size):
+    """Yield chunks of ``(rowid, *select)`` for rows added after ``watermark``."""
+    cursor = conn.execute(
+        f"SELECT rowid, {', '.join(select)} FROM {quote(TABLE)} WHERE rowid > ? ORDER BY rowid",
+        [watermark],
+    )
+    while True:
+        chunk = cursor.fetchmany(chunk_size)
+        if not chunk:
+            return
+        yield chunk
+
+
+def row_at(conn, rowid):
+    """The full row stored under ``rowid``, or ``None``."""
+    return conn.execute(f"SELECT * FROM {quote(TABLE)} WHERE rowid = ?", [rowid]).fetchone()
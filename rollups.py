@@ -0,0 +1,297 @@
+"""Materialized monthly rollups and index advisor for the suspect table.
+
+Run as a maintenance command against the registry database::
+
+    python rollups.py path/to/new_suspect_file2.db            # everything
+    python rollups.py path/to/new_suspect_file2.db --explain  # plans only
+
+It builds ``suspect_monthly_rollup`` (record counts keyed by month,
+bank_name and source), installs triggers that keep it consistent with
+inserts, updates and deletes on ``new_suspect_file2``, creates the indexes
+the dashboard's queries need and reports each query's ``EXPLAIN QUERY
+PLAN``. Once the rollup exists the dashboard answers its record counts and
+bank/source charts from it, whose size depends on months x banks x sources
+rather than on the number of records.
+
+It also installs ``suspect_change_log``, a one-row counter that triggers
+bump on every delete or update of a record. The rowid followers of
+:mod:`incremental` read it to notice that rows they already folded changed,
+instead of counting the table on every refresh.
+"""
+import argparse
+import sqlite3
+
+import pandas as pd
+
+import pagination
+import queries
+
+ROLLUP_TABLE = "suspect_monthly_rollup"
+ROLLUP_COLUMNS = ["bank_name", "source"]
+INDEXED_COLUMNS = [queries.DATE_COLUMN] + ROLLUP_COLUMNS + queries.IDENTIFIER_COLUMNS
+TRIGGERS = {
+    "insert": f"{ROLLUP_TABLE}_insert",
+    "delete": f"{ROLLUP_TABLE}_delete",
+    "update": f"{ROLLUP_TABLE}_update",
+}
+CHANGE_LOG = "suspect_change_log"
+CHANGE_TRIGGERS = {
+    "delete": f"{CHANGE_LOG}_delete",
+    "update": f"{CHANGE_LOG}_update",
+}
+
+
+def _month(row):
+    return f"strftime('%Y-%m', {row}.{queries.quote(queries.DATE_COLUMN)})"
+
+
+def _match(row):
+    # ``IS`` rather than ``=`` so NULL months, banks and sources still match
+    return (f"month IS {_month(row)} AND bank_name IS {row}.bank_name "
+            f"AND source IS {row}.source")
+
+
+def _add(row):
+    rollup = queries.quote(ROLLUP_TABLE)
+    return (f"INSERT INTO {rollup} (month, bank_name, source, records) "
+            f"SELECT {_month(row)}, {row}.bank_name, {row}.source, 0 "
+            f"WHERE NOT EXISTS (SELECT 1 FROM {rollup} WHERE {_match(row)}); "
+            f"UPDATE {rollup} SET records = records + 1 WHERE {_match(row)};")
+
+
+def _remove(row):
+    rollup = queries.quote(ROLLUP_TABLE)
+    return (f"UPDATE {rollup} SET records = records - 1 WHERE {_match(row)}; "
+            f"DELETE FROM {rollup} WHERE {_match(row)} AND records <= 0;")
+
+
+def rebuild(conn):
+    """(Re)create the rollup table from scratch and install its triggers."""
+    missing = {queries.DATE_COLUMN, *ROLLUP_COLUMNS} - set(queries.table_columns(conn))
+    if missing:
+        raise ValueError(f"{queries.TABLE} is missing columns: {', '.join(sorted(missing))}")
+
+    table, rollup = queries.quote(queries.TABLE), queries.quote(ROLLUP_TABLE)
+    date = queries.quote(queries.DATE_COLUMN)
+    with conn:
+        drop_triggers(conn)
+        conn.execute(f"DROP TABLE IF EXISTS {rollup}")
+        conn.execute(f"CREATE TABLE {rollup} (month TEXT, bank_name TEXT, source TEXT, "
+                     f"records INTEGER NOT NULL)")
+        conn.execute(f"INSERT INTO {rollup} (month, bank_name, source, records) "
+                     f"SELECT strftime('%Y-%m', {date}), bank_name, source, COUNT(*) "
+                     f"FROM {table} GROUP BY 1, 2, 3")
+        conn.execute(f"CREATE INDEX {queries.quote(ROLLUP_TABLE + '_key')} "
+                     f"ON {rollup} (month, bank_name, source)")
+        conn.execute(f"CREATE TRIGGER {TRIGGERS['insert']} AFTER INSERT ON {table} "
+                     f"BEGIN {_add('NEW')} END")
+        conn.execute(f"CREATE TRIGGER {TRIGGERS['delete']} AFTER DELETE ON {table} "
+                     f"BEGIN {_remove('OLD')} END")
+        conn.execute(f"CREATE TRIGGER {TRIGGERS['update']} "
+                     f"AFTER UPDATE OF {date}, bank_name, source ON {table} "
+                     f"BEGIN {_remove('OLD')} {_add('NEW')} END")
+
+
+def drop_triggers(conn):
+    for trigger in TRIGGERS.values():
+        conn.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+
+
+def drop(conn):
+    with conn:
+        drop_triggers(conn)
+        conn.execute(f"DROP TABLE IF EXISTS {queries.quote(ROLLUP_TABLE)}")
+
+
+def create_indexes(conn):
+    """Create the indexes behind the dashboard's filters; return their names."""
+    columns = set(queries.table_columns(conn))
+    created = []
+    with conn:
+        for column in INDEXED_COLUMNS:
+            if column not in columns:
+                continue
+            name = f"idx_{queries.TABLE}_{column}"
+            conn.execute(f"CREATE INDEX IF NOT EXISTS {queries.quote(name)} "
+                         f"ON {queries.quote(queries.TABLE)} ({queries.quote(column)})")
+            created.append(name)
+        conn.execute("ANALYZE")
+    return created
+
+
+def install_change_log(conn):
+    """Create the delete/update counter and its triggers (kept if already there)."""
+    table, log = queries.quote(queries.TABLE), queries.quote(CHANGE_LOG)
+    with conn:
+        conn.execute(f"CREATE TABLE IF NOT EXISTS {log} (changes INTEGER NOT NULL)")
+        conn.execute(f"INSERT INTO {log} (changes) SELECT 0 WHERE NOT EXISTS (SELECT 1 FROM {log})")
+        for event, trigger in CHANGE_TRIGGERS.items():
+            conn.execute(f"CREATE TRIGGER IF NOT EXISTS {trigger} AFTER {event.upper()} ON {table} "
+                         f"BEGIN UPDATE {log} SET changes = changes + 1; END")
+
+
+def change_count(conn):
+    """Deletes and updates seen by the change log, or ``None`` if it is not installed."""
+    names = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE name LIKE ?",
+                                            [f"{CHANGE_LOG}%"])}
+    if not {CHANGE_LOG, *CHANGE_TRIGGERS.values()} <= names:
+        return None
+    return conn.execute(f"SELECT changes FROM {queries.quote(CHANGE_LOG)}").fetchone()[0]
+
+
+def is_available(conn):
+    """Whether the rollup table and all of its triggers are installed."""
+    names = {row[0] for row in conn.execute("SELECT name FROM sqlite_master")}
+    return ROLLUP_TABLE in names and set(TRIGGERS.values()) <= names
+
+
+# ---- answers, mirroring the ``queries`` functions --------------------------
+def answers(func, *args):
+    """Whether the rollup can answer ``func(*args)`` from ``queries``."""
+    if func.__name__ in {"distinct_count", "distinct_values", "value_counts"}:
+        return args[0] in ROLLUP_COLUMNS
+    return func.__name__ in {"record_count", "list_months"}
+
+
+def rollup_filter(months):
+    """The sidebar Month/Year selection as a predicate on the rollup's month."""
+    if months is None:
+        return "", []
+    if "All" in months:
+        return "month IS NOT NULL", []
+    if not months:
+        return "0", []
+    return f"month IN ({', '.join('?' * len(months))})", list(months)
+
+
+def record_count_sql(months=None):
+    clause, params = queries.combine(rollup_filter(months))
+    return f"SELECT COALESCE(SUM(records), 0) FROM {queries.quote(ROLLUP_TABLE)} {clause}", params
+
+
+def record_count(conn, months=None):
+    return conn.execute(*record_count_sql(months)).fetchone()[0]
+
+
+def list_months_sql():
+    return (f"SELECT DISTINCT month FROM {queries.quote(ROLLUP_TABLE)} "
+            f"WHERE month IS NOT NULL ORDER BY month"), []
+
+
+def list_months(conn):
+    return [row[0] for row in conn.execute(*list_months_sql())]
+
+
+def distinct_count(conn, column, months=None):
+    clause, params = queries.combine(rollup_filter(months))
+    sql = f"SELECT COUNT(DISTINCT {queries.quote(column)}) FROM {queries.quote(ROLLUP_TABLE)} {clause}"
+    return conn.execute(sql, params).fetchone()[0]
+
+
+def distinct_values(conn, column):
+    sql = f"SELECT DISTINCT {queries.quote(column)} FROM {queries.quote(ROLLUP_TABLE)}"
+    return [row[0] for row in conn.execute(sql)]
+
+
+def value_counts_sql(column, months=None, limit=None):
+    col = queries.quote(column)
+    clause, params = queries.combine(rollup_filter(months), (f"{col} IS NOT NULL", []))
+    sql = (f"SELECT {col} AS value, SUM(records) AS count FROM {queries.quote(ROLLUP_TABLE)} "
+           f"{clause} GROUP BY {col} ORDER BY count DESC, {col}")
+    if limit is not None:
+        sql += " LIMIT ?"
+        params.append(int(limit))
+    return sql, params
+
+
+def value_counts(conn, column, months=None, limit=None):
+    sql, params = value_counts_sql(column, months, limit)
+    return pd.read_sql_query(sql, conn, params=params)
+
+
+# ---- index advisor ----------------------------------------------------------
+def dashboard_queries(conn):
+    """The statements the dashboard issues, as ``(label, sql, params)``."""
+    columns = queries.table_columns(conn)
+    counted = [column for column in columns if column not in queries.EXCLUDED_COLUMNS]
+    months = list_months(conn) if is_available(conn) else queries.list_months(conn)
+    sample = months[-1:] or ["2024-01"]
+    where = queries.month_filter(sample)
+
+    statements = [
+        ("months", *queries.list_months_sql()),
+        ("record count", *queries.record_count_sql()),
+        (f"record count {sample[0]}", *queries.record_count_sql(where)),
+        (f"unique fields {sample[0]}", *queries.distinct_counts_sql(counted, where)),
+    ]
+    for column in ROLLUP_COLUMNS:
+        statements.append((f"{column} counts {sample[0]}", *queries.value_counts_sql(column, where)))
+    for column in queries.IDENTIFIER_COLUMNS:
+        if column in columns:
+            statements.append((f"top {column} {sample[0]}", *queries.value_counts_sql(column, where, 10)))
+            drill_down = queries.conjoin(where, queries.column_filter(column, ""))
+            statements.append((f"drill-down page {column}", *pagination.page_sql(drill_down, columns)))
+            statements.append((f"drill-down count {column}", *queries.record_count_sql(drill_down)))
+            statements.append((f"drill-down page {column} sorted, next",
+                               *pagination.page_sql(drill_down, columns, column, cursor=("", 0))))
+    # Clusters and search results filter on a list of rowids
+    matched = queries.rowid_filter([1, 2, 3])
+    statements.append(("matched records page", *pagination.page_sql(matched, columns)))
+    statements.append(("matched records count", *queries.record_count_sql(matched)))
+    if is_available(conn):
+        statements.append(("rollup months", *list_months_sql()))
+        statements.append((f"rollup record count {sample[0]}", *record_count_sql(sample)))
+        for column in ROLLUP_COLUMNS:
+            statements.append((f"rollup {column} counts {sample[0]}", *value_counts_sql(column, sample)))
+    return statements
+
+
+def explain(conn):
+    """``EXPLAIN QUERY PLAN`` for every dashboard query, with the indexes it uses."""
+    report = []
+    for label, sql, params in dashboard_queries(conn):
+        plan = [row[-1] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+        indexes = sorted({step.split(" INDEX ")[1].split(" ")[0]
+                          for step in plan if " INDEX " in step and "VIRTUAL TABLE" not in step})
+        report.append({"query": label, "indexes": indexes, "plan": plan})
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Maintain rollups and indexes for the suspect registry.")
+    parser.add_argument("db_path")
+    parser.add_argument("--rebuild", action="store_true", help="rebuild the monthly rollup and its triggers")
+    parser.add_argument("--indexes", action="store_true", help="create the dashboard's indexes")
+    parser.add_argument("--change-log", action="store_true", help="install the delete/update counter")
+    parser.add_argument("--explain", action="store_true", help="report EXPLAIN QUERY PLAN per query")
+    parser.add_argument("--drop", action="store_true", help="remove the rollup table and triggers")
+    args = parser.parse_args()
+    run_all = not (args.rebuild or args.indexes or args.change_log or args.explain or args.drop)
+
+    conn = sqlite3.connect(args.db_path)
+    try:
+        if args.drop:
+            drop(conn)
+            print(f"Dropped {ROLLUP_TABLE} and its triggers")
+        if args.rebuild or run_all:
+            rebuild(conn)
+            rows = conn.execute(f"SELECT COUNT(*) FROM {queries.quote(ROLLUP_TABLE)}").fetchone()[0]
+            print(f"Rebuilt {ROLLUP_TABLE}: {rows} rows")
+        if args.indexes or run_all:
+            for name in create_indexes(conn):
+                print(f"Index ready: {name}")
+        if args.change_log or run_all:
+            install_change_log(conn)
+            print(f"Change log ready: {CHANGE_LOG} ({change_count(conn)} changes so far)")
+        if args.explain or run_all:
+            for entry in explain(conn):
+                uses = ", ".join(entry["indexes"]) or "no index"
+                print(f"\n{entry['query']}: {uses}")
+                for step in entry["plan"]:
+                    print(f"    {step}")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+"""Columnar (Parquet) snapshot of the suspect table for fast cold starts.
+
+The first load scans SQLite once and writes ``<db>.snapshot.parquet`` with
+compact dtypes: low-cardinality text (bank_name, source, ifsc_code, ...) as
+dictionary/categorical columns, ``Date`` as a native timestamp, digit-only
+identifiers as the narrowest integer type and other text as Arrow strings.
+Later starts read that file instead of re-querying the database. Parquet is
+compressed, so loading still decodes the whole table into pandas memory:
+the saving is the compact dtypes (the frame is a fraction of what
+``SELECT *`` into object columns takes), not memory mapping. The snapshot
+records the database file's size and mtime (and those of its WAL file) and
+is rebuilt automatically once they change. While one session rebuilds it,
+the others keep answering from the previous snapshot.
+
+Requires ``pyarrow``; :func:`available` reports whether it is installed.
+"""
+import os
+import re
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+import queries
+from profiling import resident_memory
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - optional dependency
+    pa = pq = None
+
+MONTH_COLUMN = "Month_Year"
+CATEGORICAL_COLUMNS = ["bank_name", "source", "ifsc_code"]
+CATEGORICAL_RATIO = 0.5
+FINGERPRINT_KEY = b"suspect_registry_fingerprint"
+DIGITS = re.compile(r"[1-9][0-9]{0,17}")
+
+
+def available():
+    return pq is not None
+
+
+def snapshot_path(db_path):
+    return f"{db_path}.snapshot.parquet"
+
+
+def db_fingerprint(db_path):
+    """Size and mtime of the database and its WAL file, as a string."""
+    parts = []
+    for path in (db_path, f"{db_path}-wal"):
+        try:
+            stat = os.stat(path)
+            parts.append(f"{stat.st_size}:{stat.st_mtime_ns}")
+        except OSError:
+            parts.append("-")
+    return "|".join(parts)
+
+
+def compact_column(series, name):
+    """Narrowest sensible dtype for one column of the suspect table."""
+    if name == queries.DATE_COLUMN:
+        # Same ISO forms SQLite's date() reads, whichever one the first row uses;
+        # UTC offsets are converted to UTC, as SQLite does
+        return pd.to_datetime(series, errors='coerce', format="ISO8601", utc=True)
+
+    values = series.dropna()
+    # round() rather than % 1, which pyarrow-backed floats don't implement
+    if pd.api.types.is_float_dtype(series) and (values == values.round()).all():
+        series = series.astype("Int64")
+    if pd.api.types.is_integer_dtype(series):
+        return pd.to_numeric(series, downcast="unsigned" if (values >= 0).all() else "integer")
+
+    if values.empty:
+        return series.astype("string[pyarrow]")
+    text = values.astype(str)
+    if name in CATEGORICAL_COLUMNS or text.nunique() <= CATEGORICAL_RATIO * len(text):
+        return series.astype("category")
+    # Identifiers made only of digits (no leading zero) fit in a 64-bit integer
+    if text.str.fullmatch(DIGITS).all():
+        numbers = pd.to_numeric(series, errors='coerce')
+        if numbers.notna().sum() == len(values):
+            return numbers.astype("UInt64" if series.isna().any() else np.uint64)
+    return series.astype("string[pyarrow]")
+
+
+def build(db_path, path=None):
+    """Scan SQLite once and write the compact snapshot; return the frame."""
+    path = path or snapshot_path(db_path)
+    fingerprint = db_fingerprint(db_path)
+    conn = queries.connect(db_path)
+    try:
+        frame = pd.read_sql_query(f"SELECT * FROM {queries.quote(queries.TABLE)}", conn,
+                                  dtype_backend="pyarrow")
+    finally:
+        conn.close()
+
+    frame = pd.DataFrame({name: compact_column(frame[name], name) for name in frame.columns})
+    if queries.DATE_COLUMN in frame.columns:
+        frame[MONTH_COLUMN] = frame[queries.DATE_COLUMN].dt.strftime("%Y-%m").astype("category")
+
+    table = pa.Table.from_pandas(frame, preserve_index=False)
+    metadata = dict(table.schema.metadata or {})
+    metadata[FINGERPRINT_KEY] = fingerprint.encode()
+    tmp_path = f"{path}.tmp"
+    pq.write_table(table.replace_schema_metadata(metadata), tmp_path)
+    os.replace(tmp_path, path)
+    return frame
+
+
+def is_fresh(db_path, path=None):
+    path = path or snapshot_path(db_path)
+    if not os.path.exists(path):
+        return False
+    metadata = pq.read_schema(path).metadata or {}
+    return metadata.get(FINGERPRINT_KEY, b"").decode() == db_fingerprint(db_path)
+
+
+def load(db_path, path=None):
+    """Return ``(frame, report)``, rebuilding the snapshot first if it is stale."""
+    path = path or snapshot_path(db_path)
+    started = time.perf_counter()
+    rss_before = resident_memory()
+    if is_fresh(db_path, path):
+        frame = pq.read_table(path).to_pandas()
+        origin = "snapshot"
+    else:
+        frame = build(db_path, path)
+        origin = "rebuilt"
+    report = {
+        "origin": origin,
+        "rows": len(frame),
+        "seconds": time.perf_counter() - started,
+        "file_bytes": os.path.getsize(path),
+        "frame_bytes": int(frame.memory_usage(deep=True).sum()),
+        "rss_before": rss_before,
+        "rss_after": resident_memory(),
+    }
+    return frame, report
+
+
+class Snapshot:
+    """Answers the dashboard's summaries from the in-memory columnar frame."""
+
+    ANSWERS = {"record_count", "distinct_count", "distinct_values", "list_months",
+               "distinct_counts", "value_counts"}
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self.frame, self.report = load(db_path)
+        self.fingerprint = db_fingerprint(db_path)
+
+    def answers(self, func, *args):
+        return func.__name__ in self.ANSWERS
+
+    def _rows(self, months):
+        if months is None or MONTH_COLUMN not in self.frame.columns:
+            return self.frame
+        month = self.frame[MONTH_COLUMN]
+        return self.frame[month.isin(queries.selected_months(month.cat.categories, months))]
+
+    def record_count(self, months=None):
+        return len(self._rows(months))
+
+    def distinct_count(self, column, months=None):
+        return int(self._rows(months)[column].nunique())
+
+    def distinct_values(self, column):
+        return self.frame[column].unique().tolist()
+
+    def list_months(self):
+        if MONTH_COLUMN not in self.frame.columns:
+            return []
+        return sorted(self.frame[MONTH_COLUMN].dropna().unique().tolist())
+
+    def distinct_counts(self, columns, months=None):
+        counts = self._rows(months)[columns].nunique()
+        return pd.DataFrame({"Column": columns, "Unique Values": counts.tolist()})
+
+    def value_counts(self, column, months=None, limit=None):
+        counts = self._rows(months)[column].value_counts(sort=False)
+        counts = counts[counts > 0].rename_axis("value").reset_index(name="count")
+        counts = counts.sort_values(["count", "value"], ascending=[False, True], kind="stable")
+        if limit is not None:
+            counts = counts.head(int(limit))
+        counts["value"] = counts["value"].astype(object)
+        return counts.reset_index(drop=True)
+
+    def fetch_rows(self, column, value, months=None):
+        rows = self._rows(months)
+        return rows[rows[column] == value].reset_index(drop=True)
+
+
+_snapshots = {}
+_reload_locks = {}
+_snapshots_lock = threading.Lock()
+
+
+def get_snapshot(db_path):
+    """Return the process-wide snapshot for ``db_path``, reloading it if stale.
+
+    Only one caller reloads a stale snapshot. Callers that already have a
+    snapshot keep getting the previous one until the reload finishes,
+    instead of queuing behind a full ``SELECT *`` after every write.
+    """
+    with _snapshots_lock:
+        current = _snapshots.get(db_path)
+        reload_lock = _reload_locks.setdefault(db_path, threading.Lock())
+    if current is not None and current.fingerprint == db_fingerprint(db_path):
+        return current
+    if not reload_lock.acquire(blocking=current is None):
+        return current
+    try:
+        with _snapshots_lock:
+            current = _snapshots.get(db_path)
+        if current is None or current.fingerprint != db_fingerprint(db_path):
+            current = Snapshot(db_path)
+            with _snapshots_lock:
+                _snapshots[db_path] = current
+        return current
+    finally:
+        reload_lock.release()
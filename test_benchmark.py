@@ -0,0 +1,20 @@
+import sqlite3
+
+import benchmark
+import queries
+from linkage import RecordLinkage
+
+
+def test_generated_registry_links_into_small_clusters(tmp_path):
+    path = benchmark.dataset(str(tmp_path), 20_000)
+    linkage = RecordLinkage(path)
+    linkage.refresh()
+    members, params = queries.rowid_filter(linkage.top_clusters(limit=1)[0]["rowids"])
+    conn = sqlite3.connect(path)
+    try:
+        names = conn.execute(f"SELECT COUNT(DISTINCT account_holder_name) FROM {queries.TABLE} WHERE {members}",
+                             params).fetchone()[0]
+    finally:
+        conn.close()
+    # However often its members are reported, the biggest cluster is one ring of suspects
+    assert names <= benchmark.RING_SIZE
@@ -0,0 +1,87 @@
+import os
+import sqlite3
+import sys
+
+import queries
+from cache import QueryCache
+from conftest import execute, insert
+
+
+def counting(value):
+    calls = []
+
+    def compute():
+        calls.append(value)
+        return value
+    return compute, calls
+
+
+def test_repeated_lookups_hit(registry):
+    cache = QueryCache(registry)
+    compute, calls = counting([1, 2])
+    assert cache.get(("k",), compute) == [1, 2]
+    assert cache.get(("k",), compute) == [1, 2]
+    assert len(calls) == 1
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 1, 1)
+    assert stats["hit_rate"] == 0.5
+
+
+def test_commit_from_another_connection_invalidates(registry):
+    execute(registry, "PRAGMA journal_mode = WAL")
+    cache = QueryCache(registry)
+    first = cache.query(queries.record_count)
+    stat = os.stat(registry)
+    # In WAL mode the commit only reaches the -wal file, so data_version is what notices it
+    insert(registry, [{"bank_name": "A"}])
+    assert (os.stat(registry).st_mtime_ns, os.stat(registry).st_size) == (stat.st_mtime_ns, stat.st_size)
+    assert (first, cache.query(queries.record_count)) == (0, 1)
+    assert cache.stats()["invalidations"] == 1
+
+
+def test_file_change_invalidates(registry):
+    cache = QueryCache(registry)
+    compute, calls = counting("value")
+    cache.get(("k",), compute)
+    stat = os.stat(registry)
+    os.utime(registry, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    cache.get(("k",), compute)
+    assert len(calls) == 2
+    assert cache.stats()["invalidations"] == 1
+
+
+def test_least_recently_used_entries_are_evicted(registry):
+    value = "x" * 1000
+    cache = QueryCache(registry, max_bytes=2 * sys.getsizeof(value) + 10)
+    for key in ("a", "b"):
+        cache.get((key,), lambda: value)
+    cache.get(("a",), lambda: value)  # "b" is now least recently used
+    cache.get(("c",), lambda: value)
+    stats = cache.stats()
+    assert (stats["entries"], stats["evictions"]) == (2, 1)
+    assert stats["bytes"] <= stats["max_bytes"]
+    compute, calls = counting(value)
+    cache.get(("a",), compute)
+    cache.get(("b",), compute)
+    assert calls == [value]
+
+
+def test_values_larger_than_the_cache_are_not_stored(registry):
+    cache = QueryCache(registry, max_bytes=10)
+    cache.get(("k",), lambda: "x" * 100)
+    assert cache.stats()["entries"] == 0
+
+
+def test_result_computed_while_the_database_changed_is_not_stored(registry):
+    cache = QueryCache(registry)
+
+    def compute():
+        conn = sqlite3.connect(registry)
+        conn.execute(f"INSERT INTO {queries.quote(queries.TABLE)} (bank_name) VALUES ('A')")
+        conn.commit()
+        conn.close()
+        return "stale"
+    assert cache.get(("k",), compute) == "stale"
+    assert cache.stats()["entries"] == 0
+    assert cache.get(("k",), lambda: "fresh") == "fresh"
+    assert cache.stats()["misses"] == 2
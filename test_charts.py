@@ -0,0 +1,40 @@
+import pandas as pd
+
+import charts
+
+
+def bank_counts(count):
+    return pd.DataFrame({"Bank": [f"Co-operative Bank {i:03d}" for i in range(count)],
+                         "Count": [count - i for i in range(count)],
+                         "Region": ["West"] * count})
+
+
+def test_rows_past_top_n_fold_into_one_other_row():
+    frame = bank_counts(6).sample(frac=1, random_state=1)
+    folded = charts.top_n_with_other(frame, "Bank", "Count", top_n=2)
+    assert folded["Bank"].tolist() == ["Co-operative Bank 000", "Co-operative Bank 001", "Other (4)"]
+    assert folded["Count"].tolist() == [6, 5, 4 + 3 + 2 + 1]
+    assert folded["Region"].tolist() == ["West", "West", "Other"]
+
+
+def test_short_frames_are_left_alone():
+    frame = bank_counts(3)
+    assert charts.top_n_with_other(frame, "Bank", "Count", top_n=3).equals(frame)
+
+
+def test_bar_halves_top_n_until_the_figure_fits():
+    frame = bank_counts(40)
+
+    def size(top_n):
+        return charts.payload_bytes(charts.bar(frame, "Bank", "Count", top_n=top_n, max_bytes=10 ** 9,
+                                               x="Bank", y="Count"))
+    fig = charts.bar(frame, "Bank", "Count", top_n=16, max_bytes=size(4) + 1, x="Bank", y="Count")
+    # 16 and 8 bars are over budget, 4 bars plus "Other" fit
+    assert size(8) > size(4) + 1
+    assert list(fig.data[0].x) == [f"Co-operative Bank {i:03d}" for i in range(4)] + ["Other (36)"]
+    assert fig._payload_bytes <= size(4) + 1
+
+
+def test_bar_stops_at_one_category():
+    fig = charts.bar(bank_counts(10), "Bank", "Count", max_bytes=1, x="Bank", y="Count")
+    assert list(fig.data[0].x) == ["Co-operative Bank 000", "Other (9)"]
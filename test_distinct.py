@@ -0,0 +1,71 @@
+import os
+import sqlite3
+import subprocess
+import sys
+
+import numpy as np
+
+import distinct
+import queries
+from conftest import insert
+
+
+def test_hyperloglog_stays_within_its_error():
+    sketch = distinct.HyperLogLog(distinct.precision_for(0.01))
+    sketch.add_hashes(distinct.hash_values(range(200_000)))
+    assert abs(sketch.count() - 200_000) <= 3 * sketch.error * 200_000
+
+
+def test_integral_floats_and_integers_hash_alike():
+    assert list(distinct.hash_values([123, 123.0])) == list(distinct.hash_values([123, 123]))
+    assert distinct.hash_values(["123"])[0] != distinct.hash_values([123])[0]
+    assert len(distinct.hash_values([None, 1, None])) == 1
+
+
+def test_sketches_match_count_distinct_on_integers_with_late_nulls(registry):
+    rng = np.random.default_rng(0)
+    months = ["2024-01", "2024-02", "2024-03"]
+    # "index" has INTEGER affinity, so its values come back as ints, NULLs only in later chunks
+    rows = [{"index": int(rng.integers(0, 5000)), "bank_name": f"Bank {i % 40}",
+             "Date": f"{months[i % 3]}-10"} for i in range(20_000)]
+    for row in rows[12_000:]:
+        if rng.random() < 0.3:
+            row["index"] = None
+    insert(registry, rows)
+
+    store = distinct.SketchStore(registry, distinct.precision_for(0.01), chunk_size=3_000)
+    store.refresh()
+    conn = sqlite3.connect(registry)
+    try:
+        for selection in (None, ["All"], months[1:]):
+            where = None if selection is None else queries.month_filter(selection)
+            for column in ["index", "bank_name"]:
+                exact = queries.distinct_count(conn, column, where)
+                # Two values can share a register, so small counts may be off by one
+                assert abs(store.distinct_count(column, selection) - exact) <= max(1, 3 * store.error * exact)
+    finally:
+        conn.close()
+
+
+def test_parallel_counts_match_a_single_scan(registry):
+    insert(registry, [{"bank_name": f"Bank {i % 7}", "source": f"S{i % 3}", "Date": "2024-01-01"}
+                      for i in range(100)])
+    conn = sqlite3.connect(registry)
+    try:
+        expected = queries.distinct_counts(conn, ["bank_name", "source"]).values.tolist()
+    finally:
+        conn.close()
+    assert distinct.parallel_distinct_counts(registry, ["bank_name", "source"]).values.tolist() == expected
+
+
+def test_parallel_counts_from_a_script_run_as_main(registry, tmp_path):
+    # Streamlit runs dashboard.py as __main__, without an ``if __name__`` guard
+    insert(registry, [{"bank_name": "A Bank"}, {"bank_name": "B Bank"}])
+    script = tmp_path / "page.py"
+    script.write_text("import distinct\n"
+                      "print('page ran')\n"
+                      f"print(distinct.parallel_distinct_counts({registry!r}, ['bank_name']).values.tolist())\n")
+    result = subprocess.run([sys.executable, str(script)], capture_output=True, text=True, timeout=60,
+                            env={**os.environ, "PYTHONPATH": os.path.dirname(os.path.abspath(distinct.__file__))})
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.splitlines() == ["page ran", "[['bank_name', 2]]"]
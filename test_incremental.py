@@ -0,0 +1,96 @@
+import sqlite3
+
+import pytest
+
+import queries
+import rollups
+from conftest import execute, insert
+from incremental import IncrementalAggregates
+
+
+def bank_rows(bank, count, month="2024-01"):
+    return [{"bank_name": bank, "source": "NCRP", "Date": f"{month}-15"} for _ in range(count)]
+
+
+def sql_value_counts(db_path, column):
+    conn = sqlite3.connect(db_path)
+    try:
+        return queries.value_counts(conn, column).values.tolist()
+    finally:
+        conn.close()
+
+
+def test_refresh_folds_only_new_rows(registry):
+    insert(registry, bank_rows("A Bank", 30))
+    state = IncrementalAggregates(registry, chunk_size=7)
+    assert state.refresh() == 30
+    insert(registry, bank_rows("B Bank", 5, "2024-02"))
+    assert state.refresh() == 5
+    assert state.refresh() == 0
+    assert state.record_count() == 35
+    assert state.list_months() == ["2024-01", "2024-02"]
+    assert state.value_counts("bank_name").values.tolist() == sql_value_counts(registry, "bank_name")
+
+
+def install_change_log(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        rollups.install_change_log(conn)
+    finally:
+        conn.close()
+
+
+@pytest.fixture(params=[False, True], ids=["counting", "change log"])
+def followed(request, registry):
+    """The registry, with the change log installed in the second run."""
+    if request.param:
+        install_change_log(registry)
+    return registry
+
+
+def test_refresh_without_commits_does_not_touch_the_table(registry, monkeypatch):
+    insert(registry, bank_rows("A Bank", 3))
+    state = IncrementalAggregates(registry)
+    state.refresh()
+    monkeypatch.setattr(queries, "connect", None)
+    assert state.refresh() == 0
+
+
+def test_change_log_replaces_the_row_count(registry, monkeypatch):
+    install_change_log(registry)
+    insert(registry, bank_rows("A Bank", 10))
+    state = IncrementalAggregates(registry)
+    state.refresh()
+    monkeypatch.setattr(queries, "record_count", None)
+    insert(registry, bank_rows("B Bank", 2))
+    assert state.refresh() == 2
+    # An in-place update below the watermark is caught too
+    execute(registry, f"UPDATE {queries.TABLE} SET bank_name = 'C Bank' WHERE rowid = 1")
+    state.refresh()
+    assert state.value_counts("bank_name").values.tolist() == sql_value_counts(registry, "bank_name")
+
+
+def test_reused_rowids_after_tail_delete_reset_the_state(followed):
+    registry = followed
+    insert(registry, bank_rows("A Bank", 20))
+    state = IncrementalAggregates(registry)
+    state.refresh()
+    execute(registry, f"DELETE FROM {queries.TABLE} WHERE rowid > 10")
+    insert(registry, bank_rows("Z Bank", 20))  # takes rowids 11..30 again
+
+    state.refresh()
+    assert state.record_count() == 30
+    assert state.value_counts("bank_name").values.tolist() == [["Z Bank", 20], ["A Bank", 10]]
+
+
+def test_deletes_below_the_watermark_reset_the_state(followed):
+    registry = followed
+    insert(registry, bank_rows("A Bank", 20))
+    state = IncrementalAggregates(registry)
+    state.refresh()
+    execute(registry, f"DELETE FROM {queries.TABLE} WHERE rowid IN (3, 4, 5)")
+    insert(registry, bank_rows("B Bank", 3))
+
+    state.refresh()
+    assert state.record_count() == 20
+    assert state.value_counts("bank_name").values.tolist() == sql_value_counts(registry, "bank_name")
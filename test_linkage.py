@@ -0,0 +1,44 @@
+from conftest import insert
+from linkage import RecordLinkage
+
+
+def test_records_sharing_identifiers_form_one_cluster(registry):
+    insert(registry, [
+        {"bank_name": "A Bank", "phone_number_of_suspect": "+91 9876543210"},
+        {"bank_name": "B Bank", "phone_number_of_suspect": "09876543210", "account_number": "5012345"},
+        {"bank_name": "C Bank", "account_number": "5012345"},
+        {"bank_name": "D Bank", "email_address_of_suspect": "loner@mail.com"},
+        {"bank_name": "E Bank", "phone_number_of_suspect": "NA"},
+        {"bank_name": "F Bank", "phone_number_of_suspect": "NA"},
+    ])
+    linkage = RecordLinkage(registry)
+    linkage.refresh()
+    [cluster] = linkage.top_clusters()
+    assert cluster["rowids"] == [1, 2, 3]
+    assert cluster["banks"] == ["A Bank", "B Bank", "C Bank"]
+
+
+def test_values_linking_many_identifiers_are_hubs_not_links(registry):
+    # Two suspects, each with a private email, both calling the same helpline
+    rows = [{"phone_number_of_suspect": "1800111222", "email_address_of_suspect": f"{name}@mail.com"}
+            for name in ["a", "a", "b", "b"]]
+    insert(registry, rows[:2])
+    linkage = RecordLinkage(registry, max_links=1)
+    linkage.refresh()
+    assert [cluster["rowids"] for cluster in linkage.top_clusters()] == [[1, 2]]
+
+    insert(registry, rows[2:])
+    linkage.refresh()
+    assert [cluster["rowids"] for cluster in linkage.top_clusters()] == [[1, 2], [3, 4]]
+    [hub] = linkage.hubs()
+    assert (hub["column"], hub["value"], hub["rowids"]) == ("phone_number_of_suspect", "1800111222", [1, 2, 3, 4])
+
+
+def test_repeat_offenders_stay_one_cluster(registry):
+    # Reported again and again with their own identifiers: many records, few distinct links
+    insert(registry, [{"phone_number_of_suspect": "9876543210", "email_address_of_suspect": "x@mail.com",
+                       "account_number": f"50123{i % 3}"} for i in range(200)])
+    linkage = RecordLinkage(registry, max_links=5)
+    linkage.refresh()
+    assert [cluster["records"] for cluster in linkage.top_clusters()] == [200]
+    assert linkage.hubs() == []
@@ -0,0 +1,30 @@
+from conftest import insert
+from lookup import IdentifierIndex, normalize_phone
+
+
+def test_phone_numbers_match_across_formats():
+    assert {normalize_phone(value) for value in ["+91 98765 43210", "09876543210", "919876543210",
+                                                 "98765-43210", 9876543210.0]} == {"9876543210"}
+
+
+def test_short_text_only_matches_whole_identifiers(registry):
+    insert(registry, [{"ifsc_code": "SBIN0001"}, {"ifsc_code": "SBI"}, {"ifsc_code": "SBIN0002"}])
+    index = IdentifierIndex(registry)
+    index.refresh()
+    assert index.search("ifsc_code", "sbi") == [2]
+    assert index.search("ifsc_code", "sbin") == [1, 3]
+
+
+def test_search_finds_every_identifier_column_and_reports_the_full_count(registry):
+    insert(registry, [{"phone_number_of_suspect": f"+91 98765{i:05d}"} for i in range(30)]
+           + [{"email_address_of_suspect": "Suspect@Mail.com", "account_number": "98765"}])
+    index = IdentifierIndex(registry)
+    index.refresh()
+
+    matches = index.search_all("98765", limit=10)
+    assert sorted(matches) == ["account_number", "phone_number_of_suspect"]
+    assert len(matches["phone_number_of_suspect"]) == 10
+    assert len(index.search("phone_number_of_suspect", "98765", limit=None)) == 30
+    assert index.search("phone_number_of_suspect", "9876500007", prefix=False) == [8]
+    assert index.search_all("suspect@MAIL.com") == {"email_address_of_suspect": [31]}
+    assert index.search_all("98765", columns=["account_number"]) == {"account_number": [31]}
@@ -0,0 +1,65 @@
+import csv
+import io
+import os
+
+import pytest
+
+import pagination
+import queries
+from conftest import insert
+
+BIG = 12345678901234567  # beyond float precision
+
+
+def all_pages(conn, predicate, columns, sort_column, descending, page_size=2):
+    rows, cursor = [], None
+    while True:
+        page = pagination.fetch_page(conn, predicate, columns, sort_column, descending, cursor, page_size)
+        rows += pagination.visible(page, page_size).values.tolist()
+        cursor = pagination.next_cursor(page, page_size)
+        if cursor is None:
+            return rows
+
+
+@pytest.fixture
+def conn(registry):
+    insert(registry, [
+        {"index": BIG + 1, "bank_name": "B"},
+        {"index": None, "bank_name": "A"},
+        {"index": BIG, "bank_name": "C"},
+        {"index": BIG, "bank_name": None},
+        {"index": None, "bank_name": "D"},
+        {"index": 3, "bank_name": "A"},
+        {"index": BIG + 1, "bank_name": "E"},
+    ])
+    conn = queries.connect(registry)
+    yield conn
+    conn.close()
+
+
+@pytest.mark.parametrize("sort_column", [None, "index", "bank_name"])
+@pytest.mark.parametrize("descending", [False, True])
+def test_pages_cover_every_row_once_in_sql_order(conn, sort_column, descending):
+    columns = ["index", "bank_name"]
+    sql, params = pagination.page_sql(None, columns, sort_column, descending, page_size=100)
+    expected = [list(row[2:]) for row in conn.execute(sql, params)]
+    assert all_pages(conn, None, columns, sort_column, descending) == expected
+
+
+def test_pages_keep_large_integers_exact(conn):
+    predicate = queries.column_filter("bank_name", "A")
+    rows = all_pages(conn, None, ["index"], "index", False, page_size=1)
+    assert [BIG, BIG, BIG + 1, BIG + 1] == [row[0] for row in rows[1:5]]
+    assert pagination.fetch_page(conn, predicate, ["index"])["index"].tolist() == [None, 3]
+
+
+def test_export_without_columns_is_refused(conn):
+    with pytest.raises(ValueError):
+        pagination.export_csv(conn, None, [], os.devnull)
+
+
+def test_export_bytes_removes_its_file(registry, conn):
+    before = set(os.listdir(pagination.EXPORT_DIR)) if os.path.isdir(pagination.EXPORT_DIR) else set()
+    data = pagination.export_bytes(registry, queries.column_filter("bank_name", "A"), ["index", "bank_name"], "csv")
+    assert list(csv.reader(io.StringIO(data.decode()))) == [["index", "bank_name"], ["", "A"], ["3", "A"]]
+    assert set(os.listdir(pagination.EXPORT_DIR)) <= before
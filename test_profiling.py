@@ -0,0 +1,44 @@
+import gc
+import tracemalloc
+
+import pandas as pd
+
+import charts
+from profiling import RenderProfile
+
+
+def test_tracing_stops_when_the_last_traced_rerun_finishes():
+    first, second = RenderProfile(trace_memory=True), RenderProfile(trace_memory=True)
+    with first.span("allocate"):
+        blob = bytearray(1_000_000)
+    assert first.stages[0]["peak_bytes"] >= len(blob)
+    first.finish()
+    assert tracemalloc.is_tracing()
+    second.finish()
+    second.close()
+    assert not tracemalloc.is_tracing()
+
+
+def test_an_unfinished_traced_rerun_does_not_leave_tracing_on():
+    class Interrupted(BaseException):  # like Streamlit's RerunException
+        pass
+
+    def rerun():
+        profile = RenderProfile(trace_memory=True)
+        with profile.span("page"):
+            raise Interrupted()
+
+    try:
+        rerun()
+    except Interrupted:
+        pass
+    gc.collect()
+    assert not tracemalloc.is_tracing()
+
+
+def test_figure_bytes_come_from_the_chart_build():
+    frame = pd.DataFrame({"Bank": ["A", "B"], "Count": [2, 1]})
+    profile = RenderProfile()
+    fig = profile.run("chart build", charts.bar, frame, "Bank", "Count", x="Bank", y="Count")
+    assert profile.stages[0]["rows"] == 2
+    assert profile.stages[0]["bytes"] == len(fig.to_json())
@@ -0,0 +1,64 @@
+import sqlite3
+
+import queries
+import rollups
+from conftest import execute, insert
+
+ROWS = [
+    {"bank_name": "A Bank", "source": "NCRP", "Date": "2024-01-03"},
+    {"bank_name": "A Bank", "source": "NCRP", "Date": "2024-01-20 10:00:00"},
+    {"bank_name": "B Bank", "source": None, "Date": "2024-02-01"},
+    {"bank_name": None, "source": "Police", "Date": "not a date"},
+    {"bank_name": "B Bank", "source": "Police", "Date": None},
+]
+
+
+def assert_matches_sql(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        months = queries.list_months(conn)
+        assert rollups.list_months(conn) == months
+        for selection in (None, ["All"], months[:1], []):
+            where = None if selection is None else queries.month_filter(selection)
+            assert rollups.record_count(conn, selection) == queries.record_count(conn, where)
+            for column in rollups.ROLLUP_COLUMNS:
+                expected = queries.value_counts(conn, column, where).values.tolist()
+                assert rollups.value_counts(conn, column, selection).values.tolist() == expected
+                assert rollups.distinct_count(conn, column, selection) == queries.distinct_count(conn, column, where)
+    finally:
+        conn.close()
+
+
+def rebuilt(db_path):
+    conn = sqlite3.connect(db_path)
+    rollups.rebuild(conn)
+    assert rollups.is_available(conn)
+    conn.close()
+
+
+def test_rebuild_matches_the_table(registry):
+    insert(registry, ROWS)
+    rebuilt(registry)
+    assert_matches_sql(registry)
+
+
+def test_triggers_follow_inserts_updates_and_deletes(registry):
+    insert(registry, ROWS)
+    rebuilt(registry)
+
+    insert(registry, ROWS + [{"bank_name": "C Bank", "source": "NCRP", "Date": "2024-03-09"}])
+    assert_matches_sql(registry)
+
+    execute(registry, f"UPDATE {queries.TABLE} SET bank_name = 'C Bank', Date = '2024-03-01' "
+                      f"WHERE bank_name = 'A Bank'")
+    execute(registry, f"UPDATE {queries.TABLE} SET source = NULL WHERE source = 'Police'")
+    assert_matches_sql(registry)
+
+    execute(registry, f"DELETE FROM {queries.TABLE} WHERE bank_name IS NULL OR rowid % 2 = 0")
+    assert_matches_sql(registry)
+
+    # Emptied groups disappear instead of lingering with zero records
+    execute(registry, f"DELETE FROM {queries.TABLE}")
+    conn = sqlite3.connect(registry)
+    assert conn.execute(f"SELECT COUNT(*) FROM {rollups.ROLLUP_TABLE}").fetchone()[0] == 0
+    conn.close()
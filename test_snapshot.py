@@ -0,0 +1,65 @@
+import sqlite3
+
+import pytest
+
+import queries
+import snapshot
+from conftest import insert
+
+pytestmark = pytest.mark.skipif(not snapshot.available(), reason="needs pyarrow")
+
+ROWS = [
+    {"bank_name": "A Bank", "source": "NCRP", "Date": "2024-01-03", "account_number": "123456789012"},
+    {"bank_name": "A Bank", "source": "Bank", "Date": "2024-02-20 10:00:00", "account_number": "123456789012"},
+    {"bank_name": "B Bank", "source": None, "Date": "2024-02-01", "account_number": None},
+    {"bank_name": None, "source": "Police", "Date": "not a date", "account_number": "999"},
+]
+
+
+def test_snapshot_answers_match_sql(registry):
+    insert(registry, ROWS)
+    state = snapshot.get_snapshot(registry)
+    conn = sqlite3.connect(registry)
+    try:
+        assert state.list_months() == queries.list_months(conn)
+        columns = ["bank_name", "source", "account_number"]
+        for months in (None, ["All"], ["2024-02"], []):
+            where = None if months is None else queries.month_filter(months)
+            assert state.record_count(months) == queries.record_count(conn, where)
+            assert (state.distinct_counts(columns, months).values.tolist()
+                    == queries.distinct_counts(conn, columns, where).values.tolist())
+            assert (state.value_counts("bank_name", months).values.tolist()
+                    == queries.value_counts(conn, "bank_name", where).values.tolist())
+    finally:
+        conn.close()
+
+
+def test_snapshot_reloads_after_the_database_changes(registry):
+    insert(registry, ROWS)
+    first = snapshot.get_snapshot(registry)
+    assert snapshot.get_snapshot(registry) is first
+    insert(registry, ROWS[:1])
+    assert snapshot.get_snapshot(registry).record_count() == len(ROWS) + 1
+
+
+def test_real_identifiers_and_utc_offsets(tmp_path):
+    path = str(tmp_path / "real.db")
+    conn = sqlite3.connect(path)
+    with conn:
+        conn.execute(f"CREATE TABLE {queries.TABLE} (bank_name TEXT, Date TEXT, phone_number_of_suspect REAL)")
+        conn.executemany(f"INSERT INTO {queries.TABLE} VALUES (?, ?, ?)", [
+            ("A Bank", "2024-01-31T23:00:00-05:00", 9876543210.0),
+            ("A Bank", "2024-02-01 10:00:00+05:30", None),
+            ("B Bank", "2024-01-15", 9876543210.0),
+        ])
+    try:
+        state = snapshot.Snapshot(path)
+        assert str(state.frame["phone_number_of_suspect"].dtype) in {"UInt64", "Int64"}
+        assert state.list_months() == queries.list_months(conn)
+        # Months as SQLite's strftime() sees them: offsets converted to UTC
+        february = conn.execute(f"SELECT COUNT(*) FROM {queries.TABLE} "
+                                f"WHERE strftime('%Y-%m', Date) = '2024-02'").fetchone()[0]
+        assert state.record_count(["2024-02"]) == february == 2
+        assert state.distinct_count("phone_number_of_suspect") == 1
+    finally:
+        conn.close()